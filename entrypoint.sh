@@ -1,17 +1,28 @@
 #!/bin/sh
+set -e
 
-echo 'Running collectsatic...'
-python manage.py collectstatic --no-input --settings=WSGI_APPLICATION = 'restaurante.wsgi.application'
-.settings.production
+echo 'Running collectstatic...'
+python manage.py collectstatic --no-input
 
-
-echo 'apliying migrations...'
-python manage.py wait_for_db --settings=WSGI_APPLICATION = 'restaurante.wsgi.application'
-.settings
-python manage.py migrate --settings=WSGI_APPLICATION = 'restaurante.wsgi.application'
-.settings
-python manage.py migrate --run-syncdb --settings=WSGI_APPLICATION = 'restaurante.wsgi.application'
-.settings
+echo 'Applying migrations...'
+python manage.py migrate
+python manage.py migrate --run-syncdb
 
 echo 'Running server...'
-gunicorn --env DJANGO_SETTINGS_MODULE=restaurante.settings restaurante.wsgi:application --bind 0.0.0.0:8000
\ No newline at end of file
+# Métricas de /metrics compartidas entre workers; las de la corrida anterior
+# se descartan
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/restaurante_metricas}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# ASGI por defecto: las pantallas de cocina (SSE) y las tablets lentas no
+# retienen un worker completo. DJANGO_SERVIDOR=wsgi vuelve a los workers
+# síncronos de gunicorn.
+if [ "$DJANGO_SERVIDOR" = "wsgi" ]; then
+    exec gunicorn restaurante.wsgi:application \
+        --bind 0.0.0.0:8000 --workers "${GUNICORN_WORKERS:-3}"
+fi
+
+exec gunicorn restaurante.asgi:application \
+    --worker-class uvicorn_worker.UvicornWorker \
+    --bind 0.0.0.0:8000 --workers "${GUNICORN_WORKERS:-3}"
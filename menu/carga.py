@@ -0,0 +1,220 @@
+"""Herramientas para los benchmarks que levantan gunicorn y le envían tráfico."""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from django.conf import settings
+
+
+SERVIDORES = {
+    "wsgi": ["restaurante.wsgi:application"],
+    "asgi": ["restaurante.asgi:application", "--worker-class", "uvicorn_worker.UvicornWorker"],
+}
+ARRANQUE_TIMEOUT = 20
+PETICION_TIMEOUT = 5
+
+
+class ServidorError(Exception):
+    pass
+
+
+def puerto_libre():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def arrancar_servidor(modo, puerto, workers, entorno=None):
+    """Levanta gunicorn con la configuración actual y espera a que acepte conexiones."""
+    variables = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", settings.SETTINGS_MODULE),
+        # Los settings eligen DB_CONEXIONES según el servidor
+        DJANGO_SERVIDOR=modo,
+    )
+    variables.update(entorno or {})
+    servidor = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", *SERVIDORES[modo],
+            "--bind", f"127.0.0.1:{puerto}",
+            "--workers", str(workers),
+            "--log-level", "warning",
+            # Los streams de cocina siguen abiertos al terminar
+            "--graceful-timeout", "2",
+        ],
+        cwd=settings.BASE_DIR,
+        env=variables,
+    )
+
+    limite = time.monotonic() + ARRANQUE_TIMEOUT
+    while time.monotonic() < limite:
+        if servidor.poll() is not None:
+            raise ServidorError(f"gunicorn ({modo}) terminó al arrancar.")
+        try:
+            socket.create_connection(("127.0.0.1", puerto), timeout=0.2).close()
+            return servidor
+        except OSError:
+            time.sleep(0.2)
+
+    servidor.terminate()
+    raise ServidorError(f"gunicorn ({modo}) no respondió en {ARRANQUE_TIMEOUT} s.")
+
+
+def detener_servidor(servidor):
+    servidor.terminate()
+    servidor.wait(timeout=30)
+
+
+async def peticion(puerto, ruta):
+    """GET sin keep-alive; devuelve el código de estado."""
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    try:
+        escritor.write(
+            f"GET {ruta} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode()
+        )
+        await escritor.drain()
+        respuesta = await lector.read()
+    finally:
+        escritor.close()
+    return int(respuesta.split(b" ", 2)[1])
+
+
+async def abrir_stream(puerto):
+    """Pantalla de cocina: abre el SSE y lo deja abierto sin leer."""
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    escritor.write(b"GET /cocina/stream/ HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    await escritor.drain()
+    return escritor
+
+
+async def cliente(puerto, rutas, fin, latencias, errores):
+    """Recorre las rutas en bucle hasta ``fin``; anota latencias (ms) y errores por ruta."""
+    n = 0
+    while time.monotonic() < fin:
+        ruta = rutas[n % len(rutas)]
+        n += 1
+        inicio = time.perf_counter()
+        try:
+            estado = await asyncio.wait_for(peticion(puerto, ruta), PETICION_TIMEOUT)
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            errores[ruta] = errores.get(ruta, 0) + 1
+            continue
+        if estado >= 500:
+            errores[ruta] = errores.get(ruta, 0) + 1
+            continue
+        latencias.setdefault(ruta, []).append((time.perf_counter() - inicio) * 1000)
+
+
+class Respuesta:
+    def __init__(self, estado, cabeceras, cuerpo):
+        self.estado = estado
+        self.cabeceras = cabeceras
+        self.cuerpo = cuerpo
+
+    @property
+    def texto(self):
+        return self.cuerpo.decode("utf-8", errors="replace")
+
+
+def leer_respuesta(datos):
+    cabecera, _, cuerpo = datos.partition(b"\r\n\r\n")
+    lineas = cabecera.decode("latin-1").split("\r\n")
+    estado = int(lineas[0].split(" ", 2)[1])
+    cabeceras = []
+    for linea in lineas[1:]:
+        nombre, _, valor = linea.partition(":")
+        cabeceras.append((nombre.strip().lower(), valor.strip()))
+
+    if ("transfer-encoding", "chunked") in cabeceras:
+        partes = []
+        while cuerpo:
+            tamano, _, resto = cuerpo.partition(b"\r\n")
+            tamano = int(tamano.split(b";")[0], 16)
+            if tamano == 0:
+                break
+            partes.append(resto[:tamano])
+            cuerpo = resto[tamano + 2:]
+        cuerpo = b"".join(partes)
+    return Respuesta(estado, cabeceras, cuerpo)
+
+
+class Navegador:
+    """Cliente HTTP mínimo con cookies (sesión, CSRF) y redirecciones.
+
+    Cada petición completada se anota en ``registro(metodo, ruta, estado, ms)``.
+    """
+
+    max_redirecciones = 3
+
+    def __init__(self, url, registro):
+        partes = urlsplit(url)
+        self.host = partes.hostname
+        self.puerto = partes.port or 80
+        self.registro = registro
+        self.cookies = {}
+
+    async def get(self, ruta):
+        return await self._seguir("GET", ruta)
+
+    async def post(self, ruta, datos=None):
+        datos = dict(datos or {})
+        token = self.cookies.get("csrftoken")
+        if token:
+            datos.setdefault("csrfmiddlewaretoken", token)
+        return await self._seguir("POST", ruta, urlencode(datos).encode())
+
+    async def _seguir(self, metodo, ruta, cuerpo=None):
+        respuesta = await self._solicitar(metodo, ruta, cuerpo)
+        for _ in range(self.max_redirecciones):
+            destino = dict(respuesta.cabeceras).get("location")
+            if respuesta.estado not in (301, 302, 303) or not destino:
+                break
+            ruta = urlsplit(urljoin(ruta, destino)).path
+            respuesta = await self._solicitar("GET", ruta)
+        return respuesta
+
+    async def _solicitar(self, metodo, ruta, cuerpo=None):
+        cabeceras = [
+            f"{metodo} {ruta} HTTP/1.1",
+            f"Host: {self.host}",
+            "Connection: close",
+        ]
+        if self.cookies:
+            cabeceras.append("Cookie: " + "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        if cuerpo is not None:
+            cabeceras.append("Content-Type: application/x-www-form-urlencoded")
+            cabeceras.append(f"Content-Length: {len(cuerpo)}")
+            if "csrftoken" in self.cookies:
+                cabeceras.append(f"X-CSRFToken: {self.cookies['csrftoken']}")
+
+        inicio = time.perf_counter()
+        try:
+            lector, escritor = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.puerto), PETICION_TIMEOUT
+            )
+            try:
+                escritor.write(("\r\n".join(cabeceras) + "\r\n\r\n").encode() + (cuerpo or b""))
+                await escritor.drain()
+                datos = await asyncio.wait_for(lector.read(), PETICION_TIMEOUT)
+            finally:
+                escritor.close()
+            respuesta = leer_respuesta(datos)
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            self.registro(metodo, ruta, None, (time.perf_counter() - inicio) * 1000)
+            raise
+        self.registro(metodo, ruta, respuesta.estado, (time.perf_counter() - inicio) * 1000)
+
+        for nombre, valor in respuesta.cabeceras:
+            if nombre == "set-cookie":
+                for cookie in SimpleCookie(valor).values():
+                    if cookie["max-age"] == "0":
+                        self.cookies.pop(cookie.key, None)
+                    else:
+                        self.cookies[cookie.key] = cookie.value
+        return respuesta
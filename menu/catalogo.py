@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+
+from restaurante.replica import PRIMARIA
+
+from .imagenes import nombre_variante, srcset
+from .models import Categoria
+from .versiones import aversion_actual, incrementar_version, version_actual
+
+
+CATALOGO_VERSION_KEY = "menu:catalogo:version"
+CATALOGO_TIMEOUT = 60 * 60 * 24
+# Cambiar cuando cambie la forma de los snapshots para ignorar los ya guardados
+CATALOGO_FORMATO = 2
+
+
+@dataclass(frozen=True)
+class ProductoSnapshot:
+    id: int
+    nombre: str
+    descripcion: str
+    precio: object
+    imagen: str
+    imagen_variantes: bool = False
+
+    # Las URLs se generan en cada render: las URLs firmadas de S3 expiran
+    @property
+    def imagen_url(self):
+        if not self.imagen:
+            return ""
+        if self.imagen_variantes:
+            return default_storage.url(nombre_variante(self.imagen, "card", "jpg"))
+        return default_storage.url(self.imagen)
+
+    @property
+    def imagen_srcset(self):
+        return srcset(self.imagen, "jpg") if self.imagen_variantes else ""
+
+    @property
+    def imagen_srcset_webp(self):
+        return srcset(self.imagen, "webp") if self.imagen_variantes else ""
+
+
+@dataclass(frozen=True)
+class CategoriaSnapshot:
+    id: int
+    nombre: str
+    productos: tuple
+
+
+@dataclass(frozen=True)
+class Catalogo:
+    version: int
+    categorias: tuple
+
+    def __iter__(self):
+        return iter(self.categorias)
+
+    def __len__(self):
+        return len(self.categorias)
+
+
+def version_catalogo():
+    return version_actual(CATALOGO_VERSION_KEY)
+
+
+def invalidar_catalogo():
+    """Incrementa la versión; los workers reconstruyen en su siguiente lectura."""
+    return incrementar_version(CATALOGO_VERSION_KEY)
+
+
+def _clave_catalogo(version):
+    return f"menu:catalogo:{CATALOGO_FORMATO}:{version}"
+
+
+def _categorias():
+    # Siempre de la primaria: el snapshot queda en cache bajo la versión
+    # nueva y una réplica atrasada lo guardaría desactualizado. Con using() y
+    # no db_for_write, que marcaría la petición como escritura y fijaría al
+    # cliente a la primaria
+    return (
+        Categoria.objects.using(PRIMARIA)
+        .prefetch_related("productos")
+        .order_by("id")
+    )
+
+
+def _construir_catalogo(version, categorias):
+    return Catalogo(
+        version=version,
+        categorias=tuple(
+            CategoriaSnapshot(
+                id=categoria.id,
+                nombre=categoria.nombre,
+                productos=tuple(
+                    ProductoSnapshot(
+                        id=producto.id,
+                        nombre=producto.nombre,
+                        descripcion=producto.descripcion,
+                        precio=producto.precio,
+                        imagen=producto.imagen.name or "",
+                        imagen_variantes=producto.imagen_variantes,
+                    )
+                    for producto in sorted(categoria.productos.all(), key=lambda p: p.id)
+                ),
+            )
+            for categoria in categorias
+        ),
+    )
+
+
+def obtener_catalogo():
+    version = version_catalogo()
+    clave = _clave_catalogo(version)
+    catalogo = cache.get(clave)
+    if catalogo is None:
+        catalogo = _construir_catalogo(version, _categorias())
+        cache.set(clave, catalogo, timeout=CATALOGO_TIMEOUT)
+    return catalogo
+
+
+async def aobtener_catalogo():
+    version = await aversion_actual(CATALOGO_VERSION_KEY)
+    clave = _clave_catalogo(version)
+    catalogo = await cache.aget(clave)
+    if catalogo is None:
+        categorias = [categoria async for categoria in _categorias()]
+        catalogo = _construir_catalogo(version, categorias)
+        await cache.aset(clave, catalogo, timeout=CATALOGO_TIMEOUT)
+    return catalogo
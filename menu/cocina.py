@@ -0,0 +1,268 @@
+import asyncio
+import contextvars
+import json
+import logging
+import time
+import weakref
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+from prometheus_client.core import GaugeMetricFamily
+
+from .models import EventoCocina, PedidoItem, VersionCocina
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_COCINA_ID = 1
+# Eventos que se guardan; más atrás, el cliente recarga la lista completa
+EVENTOS_CONSERVADOS = 1000
+# Segundos entre lecturas de la versión; una sola por worker, ver SondeoCocina
+STREAM_INTERVALO = 1
+STREAM_HEARTBEAT = 15
+STREAM_RETRY_MS = 3000
+# Tras este tiempo el stream se cierra y EventSource se reconecta solo (con
+# WSGI no hay stream: la vista responde 204 y la pantalla sondea)
+STREAM_DURACION = 5 * 60
+# Si el cliente se atrasó más de esto, se le pide recargar la lista completa
+STREAM_MAX_PENDIENTES = 100
+
+
+def _version():
+    return VersionCocina.objects.filter(pk=VERSION_COCINA_ID).values_list("valor", flat=True)
+
+
+def version_cocina():
+    return _version().first() or 0
+
+
+async def aversion_cocina():
+    return await _version().afirst() or 0
+
+
+def _eventos(desde, hasta):
+    return (
+        EventoCocina.objects.filter(version__gt=desde, version__lte=hasta)
+        .order_by("version")
+        .values("version", "tipo", "pedido", "item")
+    )
+
+
+def _completos(eventos, desde, hasta):
+    return eventos if len(eventos) == hasta - desde else None
+
+
+def _fuera_de_rango(desde, hasta):
+    return desde > hasta or hasta - desde > STREAM_MAX_PENDIENTES
+
+
+def eventos_desde(desde, hasta):
+    """Eventos entre dos versiones, o None si el registro ya no está completo."""
+    if _fuera_de_rango(desde, hasta):
+        return None
+    return _completos(list(_eventos(desde, hasta)), desde, hasta)
+
+
+async def aeventos_desde(desde, hasta):
+    if _fuera_de_rango(desde, hasta):
+        return None
+    return _completos([evento async for evento in _eventos(desde, hasta)], desde, hasta)
+
+
+def _siguiente_version():
+    filas = VersionCocina.objects.filter(pk=VERSION_COCINA_ID)
+    if not filas.update(valor=F("valor") + 1):
+        try:
+            with transaction.atomic():
+                VersionCocina.objects.create(pk=VERSION_COCINA_ID, valor=1)
+            return 1
+        except IntegrityError:
+            # Otro proceso creó la fila primero
+            filas.update(valor=F("valor") + 1)
+    return _version().get()
+
+
+def registrar_evento_cocina(tipo, pedido_id, item_id=None):
+    """Registra un cambio de cocina dentro de la transacción actual.
+
+    El UPDATE del contador bloquea su fila hasta el commit, así que los
+    eventos se hacen visibles en orden de versión y junto con ella: un
+    lector nunca ve una versión cuyo evento todavía no existe.
+    """
+    # Sin savepoint: dentro de una vista con atomic() se une a su transacción
+    with transaction.atomic(savepoint=False):
+        version = _siguiente_version()
+        EventoCocina.objects.create(version=version, tipo=tipo, pedido=pedido_id, item=item_id)
+        if version % EVENTOS_CONSERVADOS == 0:
+            EventoCocina.objects.filter(version__lte=version - EVENTOS_CONSERVADOS).delete()
+    return version
+
+
+def _formatear_evento(version, evento):
+    return f"id: {version}\nevent: cocina\ndata: {json.dumps(evento)}\n\n"
+
+
+def _leer_cambios(desde):
+    """Versión actual y los eventos posteriores a ``desde``."""
+    try:
+        version = version_cocina()
+        return version, [] if desde is None else eventos_desde(desde, version)
+    finally:
+        # La conexión vuelve al pool entre sondeos en vez de quedar retenida
+        # en el hilo mientras haya pantallas conectadas
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+class SondeoCocina:
+    """Un solo sondeo de la base por event loop para todos los streams.
+
+    Las pantallas esperan a que este sondeo vea una versión nueva y toman
+    los eventos de su memoria: las consultas crecen con los cambios de
+    cocina y no con el número de pantallas conectadas.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.eventos = deque(maxlen=STREAM_MAX_PENDIENTES)
+        self.suscriptores = 0
+        self._cambio = asyncio.Event()
+        self._tarea = None
+
+    def suscribir(self):
+        self.suscriptores += 1
+        if self._tarea is None:
+            # Contexto vacío: la tarea no pertenece a la petición que la
+            # arrancó ni a su hilo de sync_to_async
+            self._tarea = asyncio.get_running_loop().create_task(
+                self._sondear(), context=contextvars.Context()
+            )
+
+    def desuscribir(self):
+        self.suscriptores -= 1
+
+    async def esperar(self, segundos):
+        """Hasta la próxima versión nueva o ``segundos``, lo que pase antes."""
+        try:
+            await asyncio.wait_for(self._cambio.wait(), max(segundos, 0))
+        except asyncio.TimeoutError:
+            pass
+
+    def eventos_desde(self, desde):
+        """Eventos posteriores a ``desde``, o None si ya no están en memoria."""
+        eventos = [evento for evento in self.eventos if evento["version"] > desde]
+        return _completos(eventos, desde, self.version)
+
+    def _actualizar(self, version, eventos):
+        if version == self.version:
+            return
+        if eventos is None:
+            # Hueco en el registro: los streams atrasados recargan la lista
+            self.eventos.clear()
+        else:
+            self.eventos.extend(eventos)
+        self.version = version
+        self._cambio.set()
+        self._cambio = asyncio.Event()
+
+    async def _sondear(self):
+        try:
+            # Sin await entre la última comprobación y el finally: un stream
+            # que se suscriba después siempre arranca una tarea nueva
+            while self.suscriptores:
+                try:
+                    self._actualizar(*await sync_to_async(_leer_cambios)(self.version))
+                except DatabaseError:
+                    logger.exception("No se pudo leer la versión de cocina")
+                await asyncio.sleep(STREAM_INTERVALO)
+        finally:
+            self._tarea = None
+
+
+_sondeos = weakref.WeakKeyDictionary()
+
+
+def sondeo_cocina():
+    """El sondeo del event loop actual (uno por worker de uvicorn)."""
+    loop = asyncio.get_running_loop()
+    if loop not in _sondeos:
+        _sondeos[loop] = SondeoCocina()
+    return _sondeos[loop]
+
+
+async def stream_eventos_cocina(desde=None):
+    sondeo = sondeo_cocina()
+    sondeo.suscribir()
+    try:
+        while sondeo.version is None:
+            await sondeo.esperar(STREAM_INTERVALO)
+        ultima = sondeo.version if desde is None else desde
+        inicio = ultimo_envio = time.monotonic()
+
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+
+        while time.monotonic() - inicio < STREAM_DURACION:
+            version = sondeo.version
+
+            if version != ultima:
+                eventos = sondeo.eventos_desde(ultima)
+                if eventos is None:
+                    # El cliente perdió demasiados eventos o ya se depuraron
+                    yield _formatear_evento(version, {"tipo": "recargar", "pedido": None, "item": None})
+                else:
+                    for evento in eventos:
+                        evento = dict(evento)
+                        yield _formatear_evento(evento.pop("version"), evento)
+                ultima = version
+                ultimo_envio = time.monotonic()
+            elif time.monotonic() - ultimo_envio >= STREAM_HEARTBEAT:
+                yield ": ping\n\n"
+                ultimo_envio = time.monotonic()
+
+            ahora = time.monotonic()
+            await sondeo.esperar(min(
+                STREAM_HEARTBEAT - (ahora - ultimo_envio),
+                STREAM_DURACION - (ahora - inicio),
+            ))
+    finally:
+        sondeo.desuscribir()
+
+
+class ColaCocinaCollector:
+    """Cola de cocina para /metrics, leída de la base en cada scrape.
+
+    Sale de la base y no de los workers, así que cualquier proceso da el
+    mismo valor.
+    """
+
+    def collect(self):
+        cola = PedidoItem.objects.filter(
+            confirmado=True, surtido=False, pedido__entregado=False
+        ).aggregate(
+            por_atender=Count("id", filter=Q(atendido=False)),
+            por_surtir=Count("id", filter=Q(atendido=True)),
+            # Items confirmados antes de existir confirmado_en: la hora del pedido
+            mas_antiguo=Min(Coalesce("confirmado_en", "pedido__creado_en")),
+        )
+
+        items = GaugeMetricFamily(
+            "restaurante_cocina_items",
+            "Items confirmados que cocina no ha surtido, por estado.",
+            labels=["estado"],
+        )
+        items.add_metric(["por_atender"], cola["por_atender"])
+        items.add_metric(["por_surtir"], cola["por_surtir"])
+        yield items
+
+        espera = 0
+        if cola["mas_antiguo"] is not None:
+            espera = (now() - cola["mas_antiguo"]).total_seconds()
+        yield GaugeMetricFamily(
+            "restaurante_cocina_espera_maxima_segundos",
+            "Antigüedad del item pendiente más viejo desde su confirmación.",
+            value=espera,
+        )
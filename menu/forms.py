@@ -1,5 +1,7 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from .imagenes import almacen_espera, guardar_en_espera
 from .models import Categoria, Producto, Mesa
 
 class MesaForm(forms.ModelForm):
@@ -114,6 +116,24 @@ class ProductoForm(forms.ModelForm):
     class Meta:
         model = Producto
         fields = ["categoria", "nombre", "descripcion", "precio", "imagen"]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._imagen_anterior = self.instance.imagen.name if self.instance.pk else ""
+
+    def save(self, commit=True):
+        nueva = self.files.get(self.add_prefix("imagen"))
+        anterior = self.instance.imagen_pendiente
+        if nueva:
+            # No subir a S3 dentro de la petición: se deja en espera y se
+            # conserva la imagen actual hasta que el worker la reemplace
+            self.instance.imagen_pendiente = guardar_en_espera(nueva)
+            self.instance.imagen = self._imagen_anterior or None
+        producto = super().save(commit)
+        if nueva and anterior:
+            # La subida anterior que seguía en espera ya no la usará nadie
+            transaction.on_commit(lambda: almacen_espera().delete(anterior))
+        return producto
     
     def clean_nombre(self):
         nombre = self.cleaned_data.get('nombre', '').strip()
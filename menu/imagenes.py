@@ -0,0 +1,168 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from .models import Producto
+
+
+logger = logging.getLogger(__name__)
+
+# Ancho máximo (px) de cada variante
+VARIANTES = {
+    "thumb": 160,
+    "card": 480,
+    "full": 1200,
+}
+FORMATOS = {
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def almacen_espera():
+    return FileSystemStorage(location=settings.MEDIA_STAGING_ROOT)
+
+
+def guardar_en_espera(archivo):
+    """Guarda la subida en disco local; un worker la lleva después al storage."""
+    return almacen_espera().save(os.path.basename(archivo.name), archivo)
+
+
+def subir_imagenes_pendientes(limite=20):
+    """Sube al storage configurado las imágenes en espera. Devuelve cuántas subió."""
+    espera = almacen_espera()
+    subidas = 0
+
+    while subidas < limite:
+        with transaction.atomic():
+            producto = (
+                Producto.objects.select_for_update(skip_locked=True)
+                .exclude(imagen_pendiente="")
+                .order_by("id")
+                .first()
+            )
+            if producto is None:
+                break
+
+            pendiente = producto.imagen_pendiente
+            if espera.exists(pendiente):
+                with espera.open(pendiente, "rb") as archivo:
+                    # Usa el storage del campo (S3 en producción)
+                    producto.imagen.save(os.path.basename(pendiente), File(archivo), save=False)
+            producto.imagen_pendiente = ""
+            producto.save(update_fields=["imagen", "imagen_pendiente", "imagen_variantes"])
+
+        # Si la transacción falla el archivo sigue en espera para reintentar
+        espera.delete(pendiente)
+        subidas += 1
+
+    return subidas
+
+
+# Lo que lanza Pillow con una imagen corrupta, truncada o demasiado grande
+# (UnidentifiedImageError es un OSError)
+ERRORES_IMAGEN = (OSError, SyntaxError, ValueError, Image.DecompressionBombError)
+
+
+def _siguiente_sin_variantes(fallidas):
+    # Transacción corta: el bloqueo solo sirve para saltar filas que otro
+    # proceso está guardando, no se mantiene mientras se procesa la imagen
+    with transaction.atomic():
+        return (
+            Producto.objects.select_for_update(skip_locked=True)
+            .filter(imagen_variantes=False)
+            .exclude(imagen="")
+            .exclude(imagen__isnull=True)
+            .exclude(pk__in=fallidas)
+            .order_by("id")
+            .values_list("pk", "imagen")
+            .first()
+        )
+
+
+def generar_variantes_pendientes(limite=20, fallidas=None):
+    """Genera las variantes de las imágenes nuevas o cambiadas. Devuelve cuántas procesó.
+
+    Los ids que fallan se agregan a ``fallidas`` y no se reintentan en las
+    siguientes llamadas con el mismo conjunto.
+    """
+    fallidas = set() if fallidas is None else fallidas
+    procesadas = 0
+
+    while procesadas < limite:
+        siguiente = _siguiente_sin_variantes(fallidas)
+        if siguiente is None:
+            break
+        pk, nombre = siguiente
+
+        # Fuera de la transacción: el admin puede guardar el producto
+        # mientras se decodifica y sube la imagen
+        try:
+            generar_variantes(nombre)
+        except ERRORES_IMAGEN:
+            # La imagen original se sigue sirviendo; generar_variantes_imagenes
+            # puede reintentar
+            logger.exception("No se pudieron generar variantes para el producto %s", pk)
+            fallidas.add(pk)
+            continue
+
+        with transaction.atomic():
+            # Si la imagen cambió mientras tanto, sigue pendiente con la nueva
+            producto = (
+                Producto.objects.select_for_update()
+                .filter(pk=pk, imagen=nombre, imagen_variantes=False)
+                .first()
+            )
+            if producto is not None:
+                producto.imagen_variantes = True
+                # save() y no update(): la señal invalida el catálogo
+                producto.save(update_fields=["imagen_variantes"])
+        procesadas += 1
+
+    return procesadas
+
+
+def nombre_variante(nombre, variante, extension):
+    base, _ = os.path.splitext(nombre)
+    return f"{base}_{variante}.{extension}"
+
+
+def srcset(nombre, extension):
+    return ", ".join(
+        f"{default_storage.url(nombre_variante(nombre, variante, extension))} {ancho}w"
+        for variante, ancho in VARIANTES.items()
+    )
+
+
+def generar_variantes(nombre, storage=None):
+    """Genera thumb/card/full en WebP y JPEG junto a la imagen original."""
+    storage = storage or default_storage
+
+    with storage.open(nombre, "rb") as archivo:
+        original = ImageOps.exif_transpose(Image.open(archivo))
+        original = original.convert("RGB")
+
+    generadas = []
+    for variante, ancho in VARIANTES.items():
+        imagen = original.copy()
+        imagen.thumbnail((ancho, ancho * 4), Image.Resampling.LANCZOS)
+
+        for extension, (formato, opciones) in FORMATOS.items():
+            buffer = BytesIO()
+            imagen.save(buffer, formato, **opciones)
+
+            destino = nombre_variante(nombre, variante, extension)
+            if storage.exists(destino):
+                storage.delete(destino)
+            # Las variantes llevan el nombre del original, no el hash propio
+            guardar = getattr(storage, "save_as", storage.save)
+            generadas.append(guardar(destino, ContentFile(buffer.getvalue())))
+
+    return generadas
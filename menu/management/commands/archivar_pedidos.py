@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.timezone import now
+
+from menu.models import Pedido, PedidoHistorico, PedidoItem, PedidoItemHistorico
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve los pedidos entregados más antiguos que --dias a las tablas "
+        "históricas, por lotes, para mantener pequeñas las tablas de servicio."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=getattr(settings, "PEDIDOS_ARCHIVO_DIAS", 30),
+            help="Antigüedad mínima (según creado_en) de los pedidos a archivar.",
+        )
+        parser.add_argument("--lote", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Solo contar los pedidos a archivar.")
+
+    def handle(self, *args, **options):
+        limite = now() - timedelta(days=options["dias"])
+        pendientes = Pedido.objects.filter(entregado=True, creado_en__lt=limite)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{pendientes.count()} pedidos por archivar")
+            return
+
+        archivados = 0
+        while True:
+            movidos = self._archivar_lote(pendientes, options["lote"])
+            if not movidos:
+                break
+            archivados += movidos
+            self.stdout.write(f"{archivados} pedidos archivados...")
+
+        self.stdout.write(self.style.SUCCESS(f"{archivados} pedidos archivados"))
+
+    def _archivar_lote(self, pendientes, tamano):
+        # Cada lote es una transacción corta: no bloquea el servicio por mucho tiempo
+        with transaction.atomic():
+            ids = list(
+                pendientes.select_for_update(skip_locked=True)
+                .order_by("id")
+                .values_list("id", flat=True)[:tamano]
+            )
+            if not ids:
+                return 0
+
+            PedidoHistorico.objects.bulk_create([
+                PedidoHistorico(
+                    id=pedido.id,
+                    mesa_id=pedido.mesa_id,
+                    creado_en=pedido.creado_en,
+                    total=pedido.total,
+                )
+                for pedido in Pedido.objects.filter(id__in=ids)
+            ])
+            PedidoItemHistorico.objects.bulk_create([
+                PedidoItemHistorico(
+                    id=item.id,
+                    pedido_id=item.pedido_id,
+                    producto_id=item.producto_id,
+                    cantidad=item.cantidad,
+                    observaciones=item.observaciones,
+                    precio_unitario=item.precio_unitario,
+                    nombre_producto=item.nombre_producto,
+                )
+                for item in PedidoItem.objects.filter(pedido_id__in=ids)
+            ])
+
+            PedidoItem.objects.filter(pedido_id__in=ids).delete()
+            Pedido.objects.filter(id__in=ids).delete()
+            return len(ids)
@@ -0,0 +1,97 @@
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from menu.carga import (
+    SERVIDORES,
+    ServidorError,
+    arrancar_servidor,
+    detener_servidor,
+    peticion,
+    puerto_libre,
+)
+from menu.models import Mesa
+from restaurante.rendimiento import percentil
+
+
+MODOS = ("sin", "persistentes", "pool")
+CALENTAMIENTO = 20
+
+
+async def _medir(puerto, rutas, peticiones):
+    """Peticiones secuenciales: la latencia incluye abrir (o no) la conexión a la base."""
+    for _ in range(CALENTAMIENTO):
+        for ruta in rutas:
+            await peticion(puerto, ruta)
+
+    latencias = {ruta: [] for ruta in rutas}
+    for _ in range(peticiones):
+        for ruta in rutas:
+            inicio = time.perf_counter()
+            estado = await peticion(puerto, ruta)
+            if estado >= 500:
+                raise CommandError(f"{ruta} respondió {estado}.")
+            latencias[ruta].append((time.perf_counter() - inicio) * 1000)
+    return latencias
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia por petición de menú y cocina con cada modo de conexión "
+        "a PostgreSQL (DB_CONEXIONES). Usa la base de DATABASE_URL o la configurada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modos", default=",".join(MODOS))
+        parser.add_argument("--servidor", choices=sorted(SERVIDORES), default="wsgi")
+        parser.add_argument("--workers", type=int, default=1)
+        parser.add_argument("--peticiones", type=int, default=300, help="Peticiones por ruta y modo.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Este benchmark necesita PostgreSQL (ver DATABASE_URL).")
+        modos = [modo for modo in options["modos"].split(",") if modo]
+        for modo in modos:
+            if modo not in MODOS:
+                raise CommandError(f"Modo desconocido: {modo}")
+
+        mesa = Mesa.objects.create(nombre="benchmark-conexiones")
+        rutas = [f"/mesa/{mesa.id}/", "/cocina/json/"]
+        try:
+            resultados = {modo: self._medir_modo(modo, rutas, options) for modo in modos}
+        finally:
+            mesa.delete()
+
+        self.stdout.write(
+            f"{options['servidor']}, {options['workers']} worker(s), "
+            f"{options['peticiones']} peticiones secuenciales por ruta"
+        )
+        self.stdout.write(
+            f"{'modo':<13} {'ruta':<16} {'media ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'ahorro p50':>11}"
+        )
+        for modo, latencias in resultados.items():
+            for ruta, tiempos in latencias.items():
+                ahorro = ""
+                if "sin" in resultados and modo != "sin":
+                    base = percentil(resultados["sin"][ruta], 50)
+                    ahorro = f"{base - percentil(tiempos, 50):.2f} ms"
+                self.stdout.write(
+                    f"{modo:<13} {ruta:<16} {statistics.mean(tiempos):>9.2f} "
+                    f"{percentil(tiempos, 50):>8.2f} {percentil(tiempos, 95):>8.2f} {ahorro:>11}"
+                )
+
+    def _medir_modo(self, modo, rutas, options):
+        puerto = puerto_libre()
+        try:
+            servidor = arrancar_servidor(
+                options["servidor"], puerto, options["workers"], {"DB_CONEXIONES": modo}
+            )
+        except ServidorError as error:
+            raise CommandError(str(error))
+        try:
+            return asyncio.run(_medir(puerto, rutas, options["peticiones"]))
+        finally:
+            detener_servidor(servidor)
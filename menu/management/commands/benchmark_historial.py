@@ -0,0 +1,115 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from menu.models import Categoria, Mesa, Pedido, PedidoItem, Producto
+
+
+LOTE = 5000
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide las consultas de cocina y menú mientras crece el historial de "
+        "pedidos entregados. Todo se ejecuta en una transacción que se revierte."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanos",
+            default="10000,100000,1000000",
+            help="Pedidos entregados acumulados en cada medición, separados por coma.",
+        )
+        parser.add_argument("--mesas", type=int, default=40)
+        parser.add_argument("--repeticiones", type=int, default=50)
+        parser.add_argument("--explain", action="store_true", help="Mostrar el plan de cada consulta.")
+
+    def handle(self, *args, **options):
+        tamanos = sorted(int(tamano) for tamano in options["tamanos"].split(","))
+
+        try:
+            with transaction.atomic():
+                self._medir(tamanos, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _medir(self, tamanos, options):
+        categoria = Categoria.objects.create(nombre="Benchmark")
+        producto = Producto.objects.create(categoria=categoria, nombre="Benchmark", precio=100)
+        mesas = Mesa.objects.bulk_create(
+            [Mesa(nombre=f"benchmark-{n}") for n in range(options["mesas"])]
+        )
+        # Unos pocos pedidos activos, como en un servicio real
+        for mesa in mesas[: len(mesas) // 2]:
+            pedido = Pedido.objects.create(mesa=mesa, confirmado=True)
+            PedidoItem.objects.create(pedido=pedido, producto=producto, confirmado=True)
+
+        consultas = {
+            "cocina": lambda: list(
+                Pedido.objects.filter(confirmado=True, entregado=False)
+                .select_related("mesa")
+                .prefetch_related("items")
+            ),
+            # Lo que ejecuta menu_view; el catálogo sale de la caché
+            "menu_pedido": lambda: Pedido.objects.get_or_create(mesa=mesas[0], entregado=False),
+            "menu_items": lambda: list(
+                Pedido.objects.get(mesa=mesas[0], entregado=False).items.all()
+            ),
+        }
+
+        self.stdout.write(f"{'historial':>10} " + " ".join(f"{nombre:>14}" for nombre in consultas))
+
+        creados = 0
+        for tamano in tamanos:
+            creados = self._crear_historial(mesas, producto, creados, tamano)
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE menu_pedido, menu_pedidoitem")
+
+            medianas = []
+            for consulta in consultas.values():
+                tiempos = []
+                for _ in range(options["repeticiones"]):
+                    inicio = time.perf_counter()
+                    consulta()
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                medianas.append(statistics.median(tiempos))
+
+            self.stdout.write(f"{tamano:>10} " + " ".join(f"{ms:>11.2f} ms" for ms in medianas))
+
+            if options["explain"]:
+                cocina = Pedido.objects.filter(confirmado=True, entregado=False)
+                pedido = Pedido.objects.filter(mesa=mesas[0], entregado=False)
+                items = PedidoItem.objects.filter(pedido=pedido.get())
+                self.stdout.write(cocina.explain())
+                self.stdout.write(pedido.explain())
+                self.stdout.write(items.explain())
+
+    def _crear_historial(self, mesas, producto, creados, hasta):
+        while creados < hasta:
+            cantidad = min(LOTE, hasta - creados)
+            pedidos = Pedido.objects.bulk_create([
+                Pedido(mesa=mesas[(creados + n) % len(mesas)], entregado=True, confirmado=True)
+                for n in range(cantidad)
+            ])
+            PedidoItem.objects.bulk_create([
+                PedidoItem(
+                    pedido=pedido,
+                    producto=producto,
+                    precio_unitario=producto.precio,
+                    nombre_producto=producto.nombre,
+                    confirmado=True,
+                    atendido=True,
+                    surtido=True,
+                )
+                for pedido in pedidos
+            ])
+            creados += cantidad
+        return creados
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.carga import (
+    SERVIDORES,
+    ServidorError,
+    abrir_stream,
+    arrancar_servidor,
+    cliente,
+    detener_servidor,
+    puerto_libre,
+)
+from restaurante.rendimiento import percentil
+
+
+async def _carga(puerto, rutas, conexiones, streams, duracion):
+    abiertos = [await abrir_stream(puerto) for _ in range(streams)]
+    # Dar tiempo a que cada stream ocupe su tarea (ASGI); con WSGI el stream
+    # responde 204 y la pantalla sondea
+    await asyncio.sleep(0.5)
+
+    latencias, errores = {}, {}
+    inicio = time.monotonic()
+    await asyncio.gather(*[
+        cliente(puerto, rutas, inicio + duracion, latencias, errores)
+        for _ in range(conexiones)
+    ])
+    transcurrido = time.monotonic() - inicio
+
+    for escritor in abiertos:
+        escritor.close()
+    return latencias, errores, transcurrido
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara cuántas peticiones atienden gunicorn con workers síncronos (WSGI) "
+        "y con workers uvicorn (ASGI) mientras hay pantallas de cocina conectadas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modos", default="wsgi,asgi")
+        parser.add_argument("--rutas", default="/menu,/cocina/json/,/dashboard/")
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--conexiones", type=int, default=50, help="Clientes concurrentes.")
+        parser.add_argument(
+            "--streams",
+            type=int,
+            default=2,
+            help="Conexiones SSE de cocina abiertas durante la medición.",
+        )
+        parser.add_argument("--duracion", type=float, default=10, help="Segundos por modo.")
+
+    def handle(self, *args, **options):
+        rutas = [ruta for ruta in options["rutas"].split(",") if ruta]
+        modos = [modo for modo in options["modos"].split(",") if modo]
+        for modo in modos:
+            if modo not in SERVIDORES:
+                raise CommandError(f"Modo desconocido: {modo}")
+
+        self.stdout.write(
+            f"{options['workers']} workers, {options['conexiones']} clientes, "
+            f"{options['streams']} streams de cocina, {options['duracion']:g} s por modo"
+        )
+        self.stdout.write(
+            f"{'modo':<6} {'ruta':<20} {'peticiones':>10} {'req/s':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'errores':>8}"
+        )
+
+        for modo in modos:
+            puerto = puerto_libre()
+            try:
+                servidor = arrancar_servidor(modo, puerto, options["workers"])
+            except ServidorError as error:
+                raise CommandError(str(error))
+            try:
+                latencias, errores, transcurrido = asyncio.run(_carga(
+                    puerto, rutas, options["conexiones"], options["streams"], options["duracion"]
+                ))
+            finally:
+                detener_servidor(servidor)
+
+            for ruta in rutas:
+                tiempos = latencias.get(ruta, [])
+                self.stdout.write(
+                    f"{modo:<6} {ruta:<20} {len(tiempos):>10} {len(tiempos) / transcurrido:>8.1f} "
+                    f"{percentil(tiempos, 50):>8.1f} {percentil(tiempos, 95):>8.1f} "
+                    f"{errores.get(ruta, 0):>8}"
+                )
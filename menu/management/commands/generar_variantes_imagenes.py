@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from menu.catalogo import invalidar_catalogo
+from menu.imagenes import generar_variantes
+from menu.models import Producto
+
+
+class Command(BaseCommand):
+    help = "Genera las variantes thumb/card/full (WebP y JPEG) de las imágenes de productos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--todas",
+            action="store_true",
+            help="Regenerar también las imágenes que ya tienen variantes.",
+        )
+
+    def handle(self, *args, **options):
+        productos = Producto.objects.exclude(imagen="").exclude(imagen__isnull=True)
+        if not options["todas"]:
+            productos = productos.filter(imagen_variantes=False)
+
+        procesados = errores = 0
+        for producto in productos.iterator():
+            try:
+                generar_variantes(producto.imagen.name)
+            except OSError as error:
+                errores += 1
+                self.stderr.write(f"{producto}: {error}")
+                continue
+            Producto.objects.filter(pk=producto.pk).update(imagen_variantes=True)
+            procesados += 1
+
+        if procesados:
+            invalidar_catalogo()
+        self.stdout.write(self.style.SUCCESS(f"{procesados} imágenes procesadas, {errores} con error"))
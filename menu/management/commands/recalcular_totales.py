@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from menu.models import Pedido, PedidoItem
+
+
+class Command(BaseCommand):
+    help = "Recalcula Pedido.total desde sus items y corrige los que no cuadran."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--todos",
+            action="store_true",
+            help="Incluir pedidos ya entregados (por defecto solo los abiertos).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo reportar los pedidos con total incorrecto.",
+        )
+        parser.add_argument("--lote", type=int, default=500)
+
+    def handle(self, *args, **options):
+        suma = (
+            PedidoItem.objects.filter(pedido=OuterRef("pk"))
+            .values("pedido")
+            .annotate(suma=Sum(F("cantidad") * F("precio_unitario")))
+            .values("suma")
+        )
+        total_calculado = Coalesce(
+            Subquery(suma),
+            Value(Decimal("0")),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+
+        pedidos = Pedido.objects.all()
+        if not options["todos"]:
+            pedidos = pedidos.filter(entregado=False)
+
+        ids = list(
+            pedidos.annotate(calculado=total_calculado)
+            .exclude(total=F("calculado"))
+            .values_list("id", flat=True)
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"{len(ids)} pedidos con total incorrecto")
+            return
+
+        lote = options["lote"]
+        for inicio in range(0, len(ids), lote):
+            Pedido.objects.filter(id__in=ids[inicio:inicio + lote]).update(total=total_calculado)
+
+        self.stdout.write(self.style.SUCCESS(f"{len(ids)} pedidos corregidos"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+
+from menu.models import VentaAcumulada, VentaDiaria
+from menu.reportes import invalidar_reportes
+
+
+TRUNCADORES = {
+    VentaAcumulada.SEMANA: TruncWeek,
+    VentaAcumulada.MES: TruncMonth,
+    VentaAcumulada.ANO: TruncYear,
+}
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los acumulados de ventas (semana, mes y año) desde VentaDiaria."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            VentaAcumulada.objects.all().delete()
+
+            for tipo, truncar in TRUNCADORES.items():
+                filas = (
+                    VentaDiaria.objects.annotate(periodo=truncar("fecha"))
+                    .values("periodo")
+                    .annotate(suma=Sum("total"))
+                )
+                creadas = VentaAcumulada.objects.bulk_create(
+                    [
+                        VentaAcumulada(tipo=tipo, inicio=fila["periodo"], total=fila["suma"])
+                        for fila in filas
+                    ],
+                    batch_size=500,
+                )
+                self.stdout.write(f"{tipo}: {len(creadas)} periodos")
+
+            transaction.on_commit(invalidar_reportes)
+
+        self.stdout.write(self.style.SUCCESS("Acumulados reconstruidos"))
@@ -0,0 +1,266 @@
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404, resolve
+
+from menu.carga import (
+    SERVIDORES,
+    Navegador,
+    ServidorError,
+    arrancar_servidor,
+    detener_servidor,
+    puerto_libre,
+)
+from menu.models import Categoria, Mesa, Producto
+from restaurante.rendimiento import percentil
+
+
+# Mismo ciclo que el respaldo por sondeo de cocina.html
+POLL_COCINA = 3
+
+MESA_RE = re.compile(r'href="/mesa/(\d+)/"')
+PRODUCTO_RE = re.compile(r"/mesa/\d+/agregar/(\d+)/")
+CONFIRMAR_RE = re.compile(r"/mesa/\d+/confirmar/(\d+)/")
+ACCION_COCINA_RE = re.compile(r"/item/(\d+)/(atender|surtir)/")
+TARJETA_RE = re.compile(r'id="pedido-(\d+)"')
+
+
+class Estadisticas:
+    def __init__(self):
+        self.latencias = {}
+        self.errores = {}
+        self.tickets = 0
+
+    def registrar(self, metodo, ruta, estado, ms):
+        try:
+            nombre = resolve(ruta.split("?", 1)[0]).url_name or ruta
+        except Resolver404:
+            nombre = ruta
+        if estado is None or estado >= 400:
+            self.errores[nombre] = self.errores.get(nombre, 0) + 1
+            return
+        self.latencias.setdefault(nombre, []).append(ms)
+
+    def resumen(self, duracion):
+        nombres = sorted(set(self.latencias) | set(self.errores))
+        return {
+            nombre: {
+                "peticiones": len(self.latencias.get(nombre, [])),
+                "req_s": round(len(self.latencias.get(nombre, [])) / duracion, 2),
+                "p50_ms": round(percentil(self.latencias.get(nombre, []), 50), 2),
+                "p95_ms": round(percentil(self.latencias.get(nombre, []), 95), 2),
+                "p99_ms": round(percentil(self.latencias.get(nombre, []), 99), 2),
+                "errores": self.errores.get(nombre, 0),
+            }
+            for nombre in nombres
+        }
+
+
+async def _pausa(segundos, rng):
+    await asyncio.sleep(segundos * rng.uniform(0.5, 1.5))
+
+
+async def mesa(url, estadisticas, mesa_id, productos, fin, opciones, rng):
+    """Un turno de mesa: elegir mesa, pedir, confirmar, esperar a cocina y pagar."""
+    navegador = Navegador(url, estadisticas.registrar)
+    menu = f"/mesa/{mesa_id}/"
+
+    while time.monotonic() < fin:
+        try:
+            await navegador.get("/")
+            respuesta = await navegador.get(menu)
+            for producto_id in rng.sample(productos, min(opciones["items"], len(productos))):
+                await _pausa(opciones["pausa"], rng)
+                respuesta = await navegador.post(f"/mesa/{mesa_id}/agregar/{producto_id}/")
+
+            confirmar = CONFIRMAR_RE.search(respuesta.texto)
+            if confirmar is None:
+                await _pausa(opciones["pausa"], rng)
+                continue
+            pedido_id = confirmar.group(1)
+            respuesta = await navegador.post(confirmar.group(0))
+
+            # Esperar a que cocina surta todo: la mesa recarga su pedido
+            ticket = f"/mesa/{mesa_id}/ticket/{pedido_id}/"
+            while ticket not in respuesta.texto and time.monotonic() < fin:
+                await _pausa(opciones["pausa"], rng)
+                respuesta = await navegador.get(menu)
+
+            if ticket in respuesta.texto:
+                await navegador.get(ticket)
+                estadisticas.tickets += 1
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            pass
+        await _pausa(opciones["pausa"], rng)
+
+
+async def pantalla_cocina(url, estadisticas, indice, pantallas, fin):
+    """Pantalla de cocina: sondea cada POLL_COCINA s y atiende/surte su parte de los items."""
+    navegador = Navegador(url, estadisticas.registrar)
+    version = None
+    tarjetas = {}
+    hechas = set()
+
+    while time.monotonic() < fin:
+        ruta = "/cocina/json/" if version is None else f"/cocina/json/?since={version}"
+        try:
+            respuesta = await navegador.get(ruta)
+            if respuesta.estado == 200:
+                datos = json.loads(respuesta.cuerpo)
+                version = datos["version"]
+                if "html" in datos:
+                    tarjetas = {
+                        tarjeta.group(1): html
+                        for html in datos["html"].split("<article")
+                        if (tarjeta := TARJETA_RE.search(html))
+                    }
+                else:
+                    tarjetas.update(datos["pedidos"])
+                    for pedido_id in datos["eliminados"]:
+                        tarjetas.pop(str(pedido_id), None)
+
+            # Cada pantalla atiende los items que le tocan para no chocar con las otras
+            for html in list(tarjetas.values()):
+                for item_id, accion in ACCION_COCINA_RE.findall(html):
+                    if int(item_id) % pantallas != indice or (item_id, accion) in hechas:
+                        continue
+                    respuesta = await navegador.get(f"/item/{item_id}/{accion}/")
+                    # Si falla, se reintenta en el siguiente sondeo
+                    if respuesta.estado < 400:
+                        hechas.add((item_id, accion))
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            pass
+        await asyncio.sleep(POLL_COCINA)
+
+
+async def _turno(url, mesas, productos, opciones):
+    estadisticas = Estadisticas()
+    rng = random.Random(opciones["semilla"])
+    inicio = time.monotonic()
+    fin = inicio + opciones["duracion"]
+
+    await asyncio.gather(
+        *[
+            mesa(url, estadisticas, mesa_id, productos, fin, opciones, random.Random(rng.random()))
+            for mesa_id in mesas
+        ],
+        *[
+            pantalla_cocina(url, estadisticas, indice, opciones["pantallas"], fin)
+            for indice in range(opciones["pantallas"])
+        ],
+    )
+    return estadisticas, time.monotonic() - inicio
+
+
+async def _descubrir(url, cantidad):
+    """Mesas y productos tal como los ve un mesero en la pantalla inicial y el menú."""
+    navegador = Navegador(url, lambda *args: None)
+    inicio = await navegador.get("/")
+    mesas = list(dict.fromkeys(MESA_RE.findall(inicio.texto)))[:cantidad]
+    if not mesas:
+        return [], []
+    menu = await navegador.get(f"/mesa/{mesas[0]}/")
+    return mesas, list(dict.fromkeys(PRODUCTO_RE.findall(menu.texto)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula un turno del restaurante: N mesas recorren el flujo completo de "
+        "pedido y M pantallas de cocina sondean y surten. Reporta throughput y "
+        "p50/p95/p99 por endpoint. Usar contra una base de pruebas: crea pedidos reales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Servidor ya levantado (runserver, gunicorn). Sin --url se levanta gunicorn.",
+        )
+        parser.add_argument("--servidor", choices=sorted(SERVIDORES), default="wsgi")
+        parser.add_argument("--workers", type=int, default=2)
+        parser.add_argument("--mesas", type=int, default=10)
+        parser.add_argument("--pantallas", type=int, default=2)
+        parser.add_argument("--items", type=int, default=3, help="Productos por pedido.")
+        parser.add_argument("--pausa", type=float, default=1.0, help="Segundos entre acciones de una mesa.")
+        parser.add_argument("--duracion", type=float, default=60)
+        parser.add_argument("--semilla", type=int, default=1)
+        parser.add_argument(
+            "--preparar",
+            action="store_true",
+            help="Crear las mesas y productos que falten (misma base que el servidor).",
+        )
+        parser.add_argument("--salida", help="Guardar el resultado en JSON para comparar versiones.")
+
+    def handle(self, *args, **options):
+        if options["pantallas"] < 1:
+            raise CommandError("Se necesita al menos una pantalla de cocina.")
+        if options["preparar"]:
+            self._preparar(options["mesas"])
+
+        servidor = None
+        url = options["url"]
+        if url is None:
+            puerto = puerto_libre()
+            try:
+                servidor = arrancar_servidor(options["servidor"], puerto, options["workers"])
+            except ServidorError as error:
+                raise CommandError(str(error))
+            url = f"http://127.0.0.1:{puerto}"
+
+        try:
+            mesas, productos = asyncio.run(_descubrir(url, options["mesas"]))
+            if len(mesas) < options["mesas"] or not productos:
+                raise CommandError(
+                    f"El servidor tiene {len(mesas)} mesas y {len(productos)} productos; "
+                    "usar --preparar o reducir --mesas."
+                )
+            estadisticas, duracion = asyncio.run(_turno(url, mesas, productos, options))
+        finally:
+            if servidor is not None:
+                detener_servidor(servidor)
+
+        resumen = estadisticas.resumen(duracion)
+        self.stdout.write(
+            f"{options['mesas']} mesas, {options['pantallas']} pantallas de cocina, "
+            f"{duracion:.0f} s: {estadisticas.tickets} tickets "
+            f"({estadisticas.tickets * 60 / duracion:.1f}/min)"
+        )
+        self.stdout.write(
+            f"{'endpoint':<24} {'peticiones':>10} {'req/s':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errores':>8}"
+        )
+        for nombre, fila in resumen.items():
+            self.stdout.write(
+                f"{nombre:<24} {fila['peticiones']:>10} {fila['req_s']:>7.2f} "
+                f"{fila['p50_ms']:>8.1f} {fila['p95_ms']:>8.1f} {fila['p99_ms']:>8.1f} "
+                f"{fila['errores']:>8}"
+            )
+
+        if options["salida"]:
+            with open(options["salida"], "w") as archivo:
+                json.dump({
+                    "mesas": options["mesas"],
+                    "pantallas": options["pantallas"],
+                    "servidor": url if options["url"] else options["servidor"],
+                    "duracion_s": round(duracion, 1),
+                    "tickets": estadisticas.tickets,
+                    "endpoints": resumen,
+                }, archivo, indent=2, ensure_ascii=False)
+
+    def _preparar(self, cantidad):
+        faltan = cantidad - Mesa.objects.count()
+        existentes = set(Mesa.objects.values_list("nombre", flat=True))
+        # Saltar los nombres que ya existen (p. ej. tras borrar una mesa sim-N)
+        libres = (f"sim-{n}" for n in itertools.count() if f"sim-{n}" not in existentes)
+        Mesa.objects.bulk_create(
+            [Mesa(nombre=next(libres)) for _ in range(max(faltan, 0))]
+        )
+        if not Producto.objects.exists():
+            # create() y no bulk_create(): las señales invalidan el catálogo
+            categoria = Categoria.objects.create(nombre="Simulación")
+            for n in range(1, 9):
+                Producto.objects.create(categoria=categoria, nombre=f"Platillo {n}", precio=50 + n * 10)
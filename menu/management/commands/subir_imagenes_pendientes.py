@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from menu.imagenes import generar_variantes_pendientes, subir_imagenes_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Sube al storage configurado las imágenes de productos que las vistas "
+        "dejaron en espera en disco local y genera las variantes de las imágenes "
+        "nuevas o cambiadas (también las cambiadas desde el admin o el shell)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--continuo", action="store_true", help="Seguir revisando la cola.")
+        parser.add_argument("--intervalo", type=float, default=2, help="Segundos entre revisiones.")
+
+    def handle(self, *args, **options):
+        fallidas = set()
+        while True:
+            subidas = subir_imagenes_pendientes()
+            if subidas:
+                self.stdout.write(f"{subidas} imágenes subidas")
+            variantes = generar_variantes_pendientes(fallidas=fallidas)
+            if variantes:
+                self.stdout.write(f"{variantes} imágenes con variantes nuevas")
+            if not options["continuo"]:
+                break
+            if not subidas and not variantes:
+                time.sleep(options["intervalo"])
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:36
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fusionar_pedidos_abiertos(apps, schema_editor):
+    # Las mesas con más de un pedido abierto conservan el más antiguo
+    Pedido = apps.get_model("menu", "Pedido")
+    PedidoItem = apps.get_model("menu", "PedidoItem")
+
+    duplicadas = (
+        Pedido.objects.filter(entregado=False, mesa__isnull=False)
+        .values("mesa")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .values_list("mesa", flat=True)
+    )
+    for mesa_id in list(duplicadas):
+        pedidos = list(Pedido.objects.filter(mesa_id=mesa_id, entregado=False).order_by("id"))
+        principal, sobrantes = pedidos[0], pedidos[1:]
+
+        PedidoItem.objects.filter(pedido__in=sobrantes).update(pedido=principal)
+        principal.total = sum((pedido.total for pedido in pedidos), 0)
+        principal.confirmado = all(pedido.confirmado for pedido in pedidos)
+        principal.save(update_fields=["total", "confirmado"])
+        Pedido.objects.filter(id__in=[pedido.id for pedido in sobrantes]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0025_pedidoitem_atendido_pedidoitem_surtido'),
+    ]
+
+    operations = [
+        migrations.RunPython(fusionar_pedidos_abiertos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pedido',
+            constraint=models.UniqueConstraint(condition=models.Q(('entregado', False)), fields=('mesa',), name='pedido_abierto_unico_por_mesa'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:36
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fusionar_ventas_por_fecha(apps, schema_editor):
+    # get_or_create sin restricción pudo dejar varias filas para el mismo día
+    VentaDiaria = apps.get_model("menu", "VentaDiaria")
+
+    duplicadas = (
+        VentaDiaria.objects.values("fecha")
+        .annotate(n=Count("id"), suma=Sum("total"))
+        .filter(n__gt=1)
+    )
+    for fila in list(duplicadas):
+        ventas = VentaDiaria.objects.filter(fecha=fila["fecha"]).order_by("id")
+        principal = ventas.first()
+        ventas.exclude(id=principal.id).delete()
+        principal.total = fila["suma"]
+        principal.save(update_fields=["total"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0026_pedido_abierto_unico_por_mesa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ventadiaria',
+            name='caja',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RunPython(fusionar_ventas_por_fecha, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ventadiaria',
+            constraint=models.UniqueConstraint(fields=('fecha', 'caja'), name='venta_diaria_unica_por_caja'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:37
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncWeek, TruncYear
+
+
+def llenar_acumulados(apps, schema_editor):
+    VentaDiaria = apps.get_model("menu", "VentaDiaria")
+    VentaAcumulada = apps.get_model("menu", "VentaAcumulada")
+
+    for tipo, truncar in (("semana", TruncWeek), ("mes", TruncMonth), ("año", TruncYear)):
+        filas = (
+            VentaDiaria.objects.annotate(periodo=truncar("fecha"))
+            .values("periodo")
+            .annotate(suma=Sum("total"))
+        )
+        VentaAcumulada.objects.bulk_create(
+            [VentaAcumulada(tipo=tipo, inicio=fila["periodo"], total=fila["suma"]) for fila in filas],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0027_ventadiaria_caja'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaAcumulada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('semana', 'Semana'), ('mes', 'Mes'), ('año', 'Año')], max_length=10)),
+                ('inicio', models.DateField()),
+                ('caja', models.PositiveSmallIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'inicio', 'caja'), name='venta_acumulada_unica')],
+            },
+        ),
+        migrations.RunPython(llenar_acumulados, migrations.RunPython.noop),
+    ]
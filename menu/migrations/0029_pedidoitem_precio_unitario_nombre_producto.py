@@ -0,0 +1,51 @@
+from django.db import migrations, models
+
+
+LOTE = 1000
+
+
+def copiar_precios(apps, schema_editor):
+    # Por lotes de id para no cargar toda la tabla en memoria
+    PedidoItem = apps.get_model("menu", "PedidoItem")
+
+    ultimo_id = 0
+    while True:
+        lote = list(
+            PedidoItem.objects.filter(id__gt=ultimo_id)
+            .select_related("producto")
+            .order_by("id")[:LOTE]
+        )
+        if not lote:
+            break
+
+        for item in lote:
+            item.precio_unitario = item.producto.precio
+            item.nombre_producto = item.producto.nombre
+        PedidoItem.objects.bulk_update(lote, ["precio_unitario", "nombre_producto"])
+        ultimo_id = lote[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0028_ventaacumulada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedidoitem',
+            name='nombre_producto',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='pedidoitem',
+            name='precio_unitario',
+            field=models.DecimalField(decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.RunPython(copiar_precios, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='pedidoitem',
+            name='precio_unitario',
+            field=models.DecimalField(decimal_places=2, max_digits=8),
+        ),
+    ]
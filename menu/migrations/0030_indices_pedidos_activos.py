@@ -0,0 +1,40 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.db.migrations.operations import AddIndex
+
+
+class AgregarIndiceConcurrente(AddIndexConcurrently):
+    """CREATE INDEX CONCURRENTLY en PostgreSQL; AddIndex normal en otros motores."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY no puede ejecutarse dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('menu', '0029_pedidoitem_precio_unitario_nombre_producto'),
+    ]
+
+    operations = [
+        AgregarIndiceConcurrente(
+            model_name='pedido',
+            index=models.Index(condition=models.Q(('confirmado', True), ('entregado', False)), fields=['id'], name='pedido_en_cocina_idx'),
+        ),
+        AgregarIndiceConcurrente(
+            model_name='pedidoitem',
+            index=models.Index(fields=['pedido', 'surtido'], name='pedidoitem_surtido_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0030_indices_pedidos_activos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PedidoHistorico',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('creado_en', models.DateTimeField(db_index=True)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('archivado_en', models.DateTimeField(auto_now_add=True)),
+                ('mesa', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pedidos_historicos', to='menu.mesa')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PedidoItemHistorico',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('cantidad', models.PositiveIntegerField(default=1)),
+                ('observaciones', models.CharField(default='con todo', max_length=255)),
+                ('precio_unitario', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('nombre_producto', models.CharField(blank=True, max_length=100)),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='menu.pedidohistorico')),
+                ('producto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='menu.producto')),
+            ],
+        ),
+    ]
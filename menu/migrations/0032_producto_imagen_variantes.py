@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0031_pedidos_historicos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='imagen_variantes',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
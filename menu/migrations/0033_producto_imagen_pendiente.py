@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0032_producto_imagen_variantes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='imagen_pendiente',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
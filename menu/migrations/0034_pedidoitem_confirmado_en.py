@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0033_producto_imagen_pendiente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedidoitem',
+            name='confirmado_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
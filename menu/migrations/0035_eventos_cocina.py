@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+def crear_version(apps, schema_editor):
+    # La fila que serializa los eventos; registrar_evento_cocina solo la actualiza
+    apps.get_model("menu", "VersionCocina").objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0034_pedidoitem_confirmado_en'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoCocina',
+            fields=[
+                ('version', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('tipo', models.CharField(max_length=20)),
+                ('pedido', models.BigIntegerField(null=True)),
+                ('item', models.BigIntegerField(null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='VersionCocina',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(crear_version, migrations.RunPython.noop),
+    ]
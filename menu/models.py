@@ -1,6 +1,12 @@
-from django.db import models
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
 from django.db.models import Sum
 from django.utils.timezone import now
+
+from .reportes import invalidar_reportes
 class Categoria(models.Model):
     nombre = models.CharField(max_length=100)
 
@@ -13,6 +19,18 @@ class Producto(models.Model):
     descripcion = models.TextField(blank=True)
     precio = models.DecimalField(max_digits=8, decimal_places=2)
     imagen = models.ImageField(upload_to="productos/", blank=True, null=True)
+    # True cuando ya existen las variantes redimensionadas de ``imagen``
+    imagen_variantes = models.BooleanField(default=False, editable=False)
+    # Archivo recibido y guardado en disco local, pendiente de subir a ``imagen``
+    imagen_pendiente = models.CharField(max_length=255, blank=True, editable=False)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        producto = super().from_db(db, field_names, values)
+        # Para saber al guardar si la imagen cambió sin volver a consultarla
+        if "imagen" in field_names:
+            producto._imagen_guardada = values[field_names.index("imagen")] or ""
+        return producto
 
     def __str__(self):
         return self.nombre
@@ -35,14 +53,38 @@ class Pedido(models.Model):
     total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     atendido = models.BooleanField(default=False)
 
+    class Meta:
+        constraints = [
+            # Una mesa solo puede tener un pedido abierto a la vez. Su índice
+            # parcial también resuelve el get_or_create(mesa, entregado=False).
+            models.UniqueConstraint(
+                fields=["mesa"],
+                condition=models.Q(entregado=False),
+                name="pedido_abierto_unico_por_mesa",
+            ),
+        ]
+        indexes = [
+            # Pedidos en cocina: solo indexa los pocos activos, no el historial
+            models.Index(
+                fields=["id"],
+                condition=models.Q(confirmado=True, entregado=False),
+                name="pedido_en_cocina_idx",
+            ),
+        ]
+
     def calcular_total(self):
         total = self.items.aggregate(
-            suma=Sum(models.F("cantidad") * models.F("producto__precio"))
+            suma=Sum(models.F("cantidad") * models.F("precio_unitario"))
         )["suma"] or 0
         self.total = total
-        self.save()
+        self.save(update_fields=["total"])
         return total
 
+    def ajustar_total(self, monto):
+        # Incremento atómico en la BD; no pisa cambios concurrentes
+        Pedido.objects.filter(pk=self.pk).update(total=models.F("total") + monto)
+        self.refresh_from_db(fields=["total"])
+
     def __str__(self):
         return f"Pedido #{self.id} - {self.mesa.nombre if self.mesa else 'Sin mesa'}"
 
@@ -51,22 +93,171 @@ class PedidoItem(models.Model):
     producto = models.ForeignKey(Producto, on_delete=models.CASCADE)
     cantidad = models.PositiveIntegerField(default=1)
     observaciones = models.CharField(max_length=255, default="con todo")
+    # Copia del producto al momento de pedir: editar el precio no cambia pedidos viejos
+    precio_unitario = models.DecimalField(max_digits=8, decimal_places=2)
+    nombre_producto = models.CharField(max_length=100, blank=True)
     confirmado = models.BooleanField(default=False)  # ya lo tenemos
     atendido = models.BooleanField(default=False)   # nuevo
     surtido = models.BooleanField(default=False)    # nuevo
+    # Espera en cocina para /metrics; vacío en items anteriores al campo
+    confirmado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["pedido", "surtido"], name="pedidoitem_surtido_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.precio_unitario is None:
+            self.precio_unitario = self.producto.precio
+        if not self.nombre_producto:
+            self.nombre_producto = self.producto.nombre
+        super().save(*args, **kwargs)
 
     def subtotal(self):
-        return self.cantidad * self.producto.precio
+        return self.cantidad * self.precio_unitario
+
+    def __str__(self):
+        return f"{self.nombre_producto} x{self.cantidad} ({self.observaciones})"
+
+class PedidoHistorico(models.Model):
+    """Pedido entregado y archivado; conserva el id original."""
+
+    id = models.BigIntegerField(primary_key=True)
+    mesa = models.ForeignKey(
+        Mesa, on_delete=models.SET_NULL, null=True, blank=True, related_name="pedidos_historicos"
+    )
+    creado_en = models.DateTimeField(db_index=True)
+    total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    archivado_en = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pedido #{self.id} (archivado) - {self.mesa.nombre if self.mesa else 'Sin mesa'}"
+
+
+class PedidoItemHistorico(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    pedido = models.ForeignKey(PedidoHistorico, on_delete=models.CASCADE, related_name="items")
+    producto = models.ForeignKey(Producto, on_delete=models.SET_NULL, null=True, blank=True)
+    cantidad = models.PositiveIntegerField(default=1)
+    observaciones = models.CharField(max_length=255, default="con todo")
+    precio_unitario = models.DecimalField(max_digits=8, decimal_places=2)
+    nombre_producto = models.CharField(max_length=100, blank=True)
+
+    def subtotal(self):
+        return self.cantidad * self.precio_unitario
+
+    def __str__(self):
+        return f"{self.nombre_producto} x{self.cantidad} ({self.observaciones})"
+
+
+class VersionCocina(models.Model):
+    """Fila única con el número del último evento de cocina."""
+
+    valor = models.BigIntegerField(default=0)
+
+
+class EventoCocina(models.Model):
+    """Cambio en cocina para los streams SSE y los deltas de ``?since=``."""
+
+    version = models.BigIntegerField(primary_key=True)
+    tipo = models.CharField(max_length=20)
+    # Sin FK: el evento sigue siendo válido si el pedido se archiva o se borra
+    pedido = models.BigIntegerField(null=True)
+    item = models.BigIntegerField(null=True)
 
     def __str__(self):
-        return f"{self.producto.nombre} x{self.cantidad} ({self.observaciones})"
+        return f"Evento {self.version}: {self.tipo} pedido {self.pedido}"
+
+
+def _caja_actual():
+    cajas = getattr(settings, "VENTAS_CAJAS", 1)
+    return os.getpid() % cajas if cajas > 1 else 0
+
+
+def _acumular(modelo, monto, **claves):
+    """UPDATE atómico de ``total``; crea la fila si todavía no existe."""
+    filas = modelo.objects.filter(**claves)
+    if filas.update(total=models.F("total") + monto):
+        return
+    try:
+        with transaction.atomic():
+            modelo.objects.create(total=monto, **claves)
+    except IntegrityError:
+        # Otro proceso creó la fila primero
+        filas.update(total=models.F("total") + monto)
+
 
 class VentaDiaria(models.Model):
     fecha = models.DateField(default=now)
+    # Contador parcial del día; con VENTAS_CAJAS = 1 siempre es 0 (una fila por día)
+    caja = models.PositiveSmallIntegerField(default=0)
     total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["fecha", "caja"], name="venta_diaria_unica_por_caja"),
+        ]
+
+    @classmethod
+    def registrar(cls, monto, fecha=None):
+        """Suma ``monto`` a las ventas del día y a sus acumulados.
+
+        Con ``VENTAS_CAJAS`` > 1 cada worker acumula en su propia fila del
+        día y los reportes suman todas las filas de la fecha.
+        """
+        fecha = fecha or now().date()
+        caja = _caja_actual()
+        _acumular(cls, monto, fecha=fecha, caja=caja)
+        VentaAcumulada.registrar(monto, fecha, caja)
+        transaction.on_commit(invalidar_reportes)
+
     def __str__(self):
         return f"Ventas {self.fecha}: {self.total}"
-    
 
 
+class VentaAcumulada(models.Model):
+    """Ventas precalculadas por semana ISO, mes y año."""
+
+    SEMANA = "semana"
+    MES = "mes"
+    ANO = "año"
+    TIPOS = [(SEMANA, "Semana"), (MES, "Mes"), (ANO, "Año")]
+
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    inicio = models.DateField()
+    caja = models.PositiveSmallIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tipo", "inicio", "caja"], name="venta_acumulada_unica"
+            ),
+        ]
+
+    @staticmethod
+    def inicio_periodo(tipo, fecha):
+        if tipo == VentaAcumulada.SEMANA:
+            return fecha - timedelta(days=fecha.weekday())
+        if tipo == VentaAcumulada.MES:
+            return fecha.replace(day=1)
+        return fecha.replace(month=1, day=1)
+
+    @classmethod
+    def registrar(cls, monto, fecha, caja=0):
+        for tipo, _ in cls.TIPOS:
+            _acumular(cls, monto, tipo=tipo, inicio=cls.inicio_periodo(tipo, fecha), caja=caja)
+
+    @classmethod
+    def por_periodo(cls, tipo):
+        return (
+            cls.objects.filter(tipo=tipo)
+            .annotate(periodo=models.F("inicio"))
+            .values("periodo")
+            .annotate(total=Sum("total"))
+            .order_by("periodo")
+        )
+
+    def __str__(self):
+        return f"Ventas {self.tipo} {self.inicio}: {self.total}"
@@ -0,0 +1,38 @@
+import hashlib
+
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from restaurante.replica import alias_replica
+
+from .versiones import aversion_actual, incrementar_version
+
+
+REPORTES_VERSION_KEY = "menu:reportes:version"
+DASHBOARD_TIMEOUT = 60 * 60
+# Leído de la réplica puede faltar la última venta: caducar pronto
+DASHBOARD_TIMEOUT_REPLICA = 60
+DASHBOARD_PARAMETROS = ("filtro", "total_tipo", "total_valor", "page")
+
+
+def invalidar_reportes():
+    return incrementar_version(REPORTES_VERSION_KEY)
+
+
+async def aclave_dashboard(parametros):
+    # La fecha entra en la clave porque el total por defecto es "hoy"
+    valores = "|".join(parametros.get(nombre, "") for nombre in DASHBOARD_PARAMETROS)
+    resumen = hashlib.md5(valores.encode()).hexdigest()
+    version = await aversion_actual(REPORTES_VERSION_KEY)
+    return f"menu:dashboard:{version}:{now().date().isoformat()}:{resumen}"
+
+
+async def aobtener_dashboard(parametros, construir):
+    """Contexto del dashboard desde la cache; ``construir`` es una corrutina."""
+    clave = await aclave_dashboard(parametros)
+    contexto = await cache.aget(clave)
+    if contexto is None:
+        contexto = await construir()
+        timeout = DASHBOARD_TIMEOUT_REPLICA if alias_replica() else DASHBOARD_TIMEOUT
+        await cache.aset(clave, contexto, timeout=timeout)
+    return contexto
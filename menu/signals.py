@@ -0,0 +1,62 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from restaurante.metricas import contar_pedido
+
+from .catalogo import invalidar_catalogo
+from .models import Categoria, Mesa, Pedido, PedidoItem, Producto
+from .tablero import invalidar_tablero
+
+
+# =====================
+# Catálogo
+# =====================
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+def catalogo_modificado(sender, **kwargs):
+    # Esperar al commit para que ningún worker reconstruya con datos viejos
+    transaction.on_commit(invalidar_catalogo)
+
+
+# =====================
+# Tablero de mesas
+# =====================
+@receiver(post_save, sender=Mesa)
+@receiver(post_delete, sender=Mesa)
+@receiver(post_save, sender=Pedido)
+@receiver(post_delete, sender=Pedido)
+@receiver(post_save, sender=PedidoItem)
+@receiver(post_delete, sender=PedidoItem)
+def tablero_modificado(sender, **kwargs):
+    # Sin esperar al TTL: crear o borrar una mesa redirige al tablero
+    transaction.on_commit(invalidar_tablero)
+
+
+# =====================
+# Métricas
+# =====================
+@receiver(post_save, sender=Pedido)
+def pedido_creado(sender, instance, created, **kwargs):
+    # Los pedidos se abren en tres vistas distintas (get_or_create)
+    if created:
+        contar_pedido("creado")
+
+
+# =====================
+# Imágenes de productos
+# =====================
+@receiver(pre_save, sender=Producto)
+def imagen_cambiada(sender, instance, **kwargs):
+    # Contra la imagen cargada de la base (Producto.from_db), sin otra
+    # consulta. El worker de subir_imagenes_pendientes genera las variantes
+    # de los productos que queden en False.
+    if getattr(instance, "_imagen_guardada", None) != (instance.imagen.name or ""):
+        instance.imagen_variantes = False
+
+
+@receiver(post_save, sender=Producto)
+def imagen_guardada(sender, instance, **kwargs):
+    instance._imagen_guardada = instance.imagen.name or ""
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+from django.db.models import Count, FilteredRelation, OuterRef, Q, Subquery
+
+from .models import Mesa, Pedido
+
+
+TABLERO_KEY = "menu:tablero"
+TABLERO_TIMEOUT = 5
+
+
+def _consultar_tablero():
+    abierto = Pedido.objects.filter(mesa=OuterRef("pk"), entregado=False)
+    return list(
+        Mesa.objects.annotate(
+            abierto=FilteredRelation("pedidos", condition=Q(pedidos__entregado=False)),
+            pedido_id=Subquery(abierto.values("id")[:1]),
+            pedido_total=Subquery(abierto.values("total")[:1]),
+            pedido_confirmado=Subquery(abierto.values("confirmado")[:1]),
+            items=Count("abierto__items"),
+            pendientes=Count("abierto__items", filter=Q(abierto__items__surtido=False)),
+            listos=Count("abierto__items", filter=Q(abierto__items__surtido=True)),
+        ).order_by("id")
+    )
+
+
+def tablero_mesas():
+    """Mesas con el resumen de su pedido abierto, en una sola consulta.
+
+    Se guarda unos segundos en cache: varios meseros refrescando el tablero
+    comparten la misma consulta.
+    """
+    mesas = cache.get(TABLERO_KEY)
+    if mesas is None:
+        mesas = _consultar_tablero()
+        cache.set(TABLERO_KEY, mesas, timeout=TABLERO_TIMEOUT)
+    return mesas
+
+
+def invalidar_tablero():
+    cache.delete(TABLERO_KEY)
+
+
+def tablero_json(mesas):
+    return [
+        {
+            "id": mesa.id,
+            "nombre": mesa.nombre,
+            "ocupada": mesa.ocupada,
+            "pedido": mesa.pedido_id,
+            "confirmado": bool(mesa.pedido_confirmado),
+            "total": str(mesa.pedido_total or 0),
+            "items": mesa.items,
+            "pendientes": mesa.pendientes,
+            "listos": mesa.listos,
+        }
+        for mesa in mesas
+    ]
@@ -1,3 +1,942 @@
-from django.test import TestCase
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from restaurante.metricas import REGISTRO
+from restaurante.rendimiento import peticiones_recientes
+from restaurante.replica import COOKIE_PRIMARIA, ReplicaMiddleware, ReplicaRouter
+from restaurante.storage import HashedMediaStorage, MediaStore, StaticStore
+
+from . import urls as menu_urls
+from .carga import leer_respuesta
+from .catalogo import _categorias, obtener_catalogo
+from .cocina import aeventos_desde, registrar_evento_cocina, stream_eventos_cocina, version_cocina
+from .imagenes import generar_variantes_pendientes, nombre_variante, subir_imagenes_pendientes
+from .management.commands.simular_turno import Command as SimularTurno, Estadisticas
+from .models import (
+    Categoria,
+    Mesa,
+    Pedido,
+    PedidoHistorico,
+    PedidoItem,
+    Producto,
+    VentaAcumulada,
+    VentaDiaria,
+)
+from .tablero import tablero_mesas
+from .versiones import incrementar_version, version_actual
+
+
+logger = logging.getLogger(__name__)
+
+
+CATEGORIAS = 8
+PRODUCTOS_POR_CATEGORIA = 12
+MESAS = 40
+PEDIDOS_ABIERTOS = 30
+ITEMS_POR_PEDIDO = 6
+PEDIDOS_ENTREGADOS = 300
+DIAS_DE_VENTAS = 400
+
+# Tiempo máximo por vista (ms). Holgado a propósito: lo que debe fallar en
+# CI es un cambio de orden de magnitud, no el ruido de la máquina.
+PRESUPUESTO_MS = 500
+
+# Consultas máximas por vista con el conjunto de datos sembrado. Deben ser
+# constantes: si crecen con los datos hay un N+1. Cada evento de cocina
+# cuesta 3 (contador, versión y evento).
+PRESUPUESTO_CONSULTAS = {
+    "seleccionar_mesa": 1,
+    "menu_cliente": 2,
+    "menu": 5,
+    "agregar_al_pedido": 12,
+    "agregar_lote_al_pedido": 13,
+    "eliminar_item_pedido": 7,
+    "confirmar_pedido": 10,
+    "generar_ticket": 16,
+    "cocina": 3,
+    "pedidos_cocina_json": 3,
+    "pedidos_cocina_stream": 0,
+    "atender_item": 7,
+    "surtir_item": 7,
+    "dashboard": 2,
+    "crear_menu": 4,
+    "crear_categoria": 2,
+    "crear_producto": 3,
+    "editar_categoria": 3,
+    "eliminar_categoria": 8,
+    "editar_producto": 2,
+    "eliminar_producto": 4,
+    "listar_mesas": 1,
+    "tablero_mesas_json": 1,
+    "crear_mesa": 0,
+    "borrar_mesa": 4,
+    "rendimiento": 2,
+    "metricas": 1,
+}
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class CacheTestCase(TestCase):
+    """Cache en memoria del proceso, vacía al empezar cada test."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+class PresupuestoVistasTests(CacheTestCase):
+    """Cada URL de menu/urls.py contra su presupuesto de consultas y tiempo."""
+
+    mediciones = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "admin123")
+
+        categorias = Categoria.objects.bulk_create(
+            [Categoria(nombre=f"Categoria {n}") for n in range(CATEGORIAS)]
+        )
+        productos = Producto.objects.bulk_create([
+            Producto(
+                categoria=categoria,
+                nombre=f"Producto {categoria.id}-{n}",
+                precio=Decimal("10.00") + n,
+            )
+            for categoria in categorias
+            for n in range(PRODUCTOS_POR_CATEGORIA)
+        ])
+        mesas = Mesa.objects.bulk_create([Mesa(nombre=f"Mesa {n}") for n in range(MESAS)])
+
+        entregados = Pedido.objects.bulk_create([
+            Pedido(mesa=mesas[n % MESAS], entregado=True, confirmado=True)
+            for n in range(PEDIDOS_ENTREGADOS)
+        ])
+        abiertos = Pedido.objects.bulk_create([
+            Pedido(mesa=mesas[n], confirmado=True) for n in range(PEDIDOS_ABIERTOS)
+        ])
+        PedidoItem.objects.bulk_create([
+            PedidoItem(
+                pedido=pedido,
+                producto=productos[(pedido.id + n) % len(productos)],
+                precio_unitario=productos[(pedido.id + n) % len(productos)].precio,
+                nombre_producto=productos[(pedido.id + n) % len(productos)].nombre,
+                confirmado=True,
+                atendido=pedido.entregado or n % 2 == 0,
+                surtido=pedido.entregado,
+            )
+            for pedido in entregados + abiertos
+            for n in range(ITEMS_POR_PEDIDO)
+        ])
+        call_command("recalcular_totales", "--todos", stdout=StringIO())
+
+        hoy = date.today()
+        VentaDiaria.objects.bulk_create([
+            VentaDiaria(fecha=hoy - timedelta(days=n), total=Decimal("1500.00") + n)
+            for n in range(DIAS_DE_VENTAS)
+        ])
+        call_command("reconstruir_ventas", stdout=StringIO())
+
+        cls.mesa_libre = mesas[-1]
+        cls.pedido = abiertos[0]
+        cls.producto = productos[0]
+        cls.categoria = categorias[-1]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        # Tabla de consultas y tiempos; visible configurando el log menu.tests
+        for nombre, (consultas, ms) in sorted(cls.mediciones.items()):
+            logger.info("%-30s %9d %6.1f", nombre, consultas, ms)
+
+    def medir(self, nombre, url, metodo="get", **kwargs):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            response = getattr(self.client, metodo)(url, **kwargs)
+            ms = (time.perf_counter() - inicio) * 1000
+
+        self.mediciones[nombre] = (len(consultas), ms)
+        self.assertLess(response.status_code, 400, f"{nombre} respondió {response.status_code}")
+        self.assertLessEqual(
+            len(consultas),
+            PRESUPUESTO_CONSULTAS[nombre],
+            f"{nombre} hizo {len(consultas)} consultas:\n"
+            + "\n".join(consulta["sql"] for consulta in consultas.captured_queries),
+        )
+        self.assertLess(ms, PRESUPUESTO_MS, f"{nombre} tardó {ms:.0f} ms")
+        return response
+
+    # Tienen además sus propias comprobaciones; se miden en tests aparte
+    MEDIDAS_APARTE = {"tablero_mesas_json", "rendimiento", "metricas"}
+
+    def peticiones(self):
+        """(nombre de URL, requiere admin, preparar) para cada URL.
+
+        ``preparar`` deja los datos que necesita la petición y devuelve la URL
+        y los argumentos para ``medir``.
+        """
+        pedido = self.pedido
+        mesa = pedido.mesa_id
+
+        def sin_datos(url, **kwargs):
+            return lambda: (url, kwargs)
+
+        def agregar_lote():
+            lineas = [{"producto": self.producto.id + n, "cantidad": 2} for n in range(10)]
+            return reverse("agregar_lote_al_pedido", args=[mesa]), {
+                "metodo": "post",
+                "data": json.dumps({"items": lineas}),
+                "content_type": "application/json",
+            }
+
+        def eliminar_item():
+            item = pedido.items.first()
+            item.confirmado = False
+            item.save()
+            return reverse("eliminar_item_pedido", args=[mesa, item.id]), {}
+
+        def confirmar():
+            Pedido.objects.filter(id=pedido.id).update(confirmado=False)
+            return reverse("confirmar_pedido", args=[mesa, pedido.id]), {"metodo": "post"}
+
+        def ticket():
+            pedido.items.update(atendido=True, surtido=True)
+            return reverse("generar_ticket", args=[mesa, pedido.id]), {}
+
+        def atender():
+            item = pedido.items.filter(atendido=False).first()
+            return reverse("atender_item", args=[item.id]), {}
+
+        def surtir():
+            item = pedido.items.filter(atendido=True).first()
+            return reverse("surtir_item", args=[item.id]), {}
+
+        def eliminar_categoria():
+            categoria = Categoria.objects.create(nombre="Temporal")
+            Producto.objects.create(categoria=categoria, nombre="Temporal", precio=1)
+            return reverse("eliminar_categoria", args=[categoria.id]), {"metodo": "post"}
+
+        def eliminar_producto():
+            producto = Producto.objects.create(categoria=self.categoria, nombre="Temporal", precio=1)
+            return reverse("eliminar_producto", args=[producto.id]), {"metodo": "post"}
+
+        return [
+            # Mesas y pedidos
+            ("seleccionar_mesa", False, sin_datos(reverse("seleccionar_mesa"))),
+            ("menu_cliente", False, sin_datos(reverse("menu_cliente"))),
+            ("menu", False, sin_datos(reverse("menu", args=[mesa]))),
+            ("agregar_al_pedido", False, sin_datos(
+                reverse("agregar_al_pedido", args=[mesa, self.producto.id]), metodo="post"
+            )),
+            ("agregar_lote_al_pedido", False, agregar_lote),
+            ("eliminar_item_pedido", False, eliminar_item),
+            ("confirmar_pedido", False, confirmar),
+            ("generar_ticket", False, ticket),
+            # Cocina
+            ("cocina", False, sin_datos(reverse("cocina"))),
+            ("pedidos_cocina_json", False, sin_datos(reverse("pedidos_cocina_json"))),
+            ("pedidos_cocina_stream", False, sin_datos(reverse("pedidos_cocina_stream"))),
+            ("atender_item", False, atender),
+            ("surtir_item", False, surtir),
+            # Dashboard, con cada filtro
+            *(
+                ("dashboard", False, sin_datos(reverse("dashboard") + f"?filtro={filtro}"))
+                for filtro in ("dia", "semana", "mes", "año")
+            ),
+            # Administración
+            ("crear_menu", True, sin_datos(reverse("crear_menu"))),
+            ("crear_categoria", True, sin_datos(reverse("crear_categoria"))),
+            ("crear_producto", True, sin_datos(reverse("crear_producto"))),
+            ("editar_categoria", True, sin_datos(reverse("editar_categoria", args=[self.categoria.id]))),
+            ("eliminar_categoria", True, eliminar_categoria),
+            ("editar_producto", True, sin_datos(reverse("editar_producto", args=[self.producto.id]))),
+            ("eliminar_producto", False, eliminar_producto),
+            ("listar_mesas", False, sin_datos(reverse("listar_mesas"))),
+            ("crear_mesa", False, sin_datos(reverse("crear_mesa"))),
+            ("borrar_mesa", False, sin_datos(
+                reverse("borrar_mesa", args=[self.mesa_libre.id]), metodo="post"
+            )),
+        ]
+
+    def test_todas_las_urls_tienen_presupuesto(self):
+        nombres = {patron.name for patron in menu_urls.urlpatterns}
+        self.assertEqual(nombres, set(PRESUPUESTO_CONSULTAS))
+        medidas = {nombre for nombre, _, _ in self.peticiones()} | self.MEDIDAS_APARTE
+        self.assertEqual(medidas, nombres)
+
+    def test_presupuesto_por_url(self):
+        for nombre, admin, preparar in self.peticiones():
+            # Cada petición parte de los datos sembrados: lo que cambia se revierte
+            with self.subTest(nombre), transaction.atomic():
+                cache.clear()
+                self.client = self.client_class()
+                if admin:
+                    self.client.force_login(self.admin)
+                url, kwargs = preparar()
+                self.medir(nombre, url, **kwargs)
+                transaction.set_rollback(True)
+
+    def test_tablero_mesas_json(self):
+        response = self.medir("tablero_mesas_json", reverse("tablero_mesas_json"))
+        mesas = {mesa["id"]: mesa for mesa in response.json()["mesas"]}
+        resumen = mesas[self.pedido.mesa_id]
+        self.assertEqual(resumen["pedido"], self.pedido.id)
+        self.assertEqual(resumen["items"], ITEMS_POR_PEDIDO)
+        self.assertEqual(resumen["pendientes"] + resumen["listos"], ITEMS_POR_PEDIDO)
+        self.assertIsNone(mesas[self.mesa_libre.id]["pedido"])
+
+    # =====================
+    # Rendimiento
+    # =====================
+    def test_rendimiento(self):
+        self.client.get(reverse("menu", args=[self.mesa_libre.id]))
+        self.client.force_login(self.admin)
+        response = self.medir("rendimiento", reverse("rendimiento"))
+        self.assertContains(response, reverse("menu", args=[self.mesa_libre.id]))
+
+    @override_settings(METRICAS_TOKEN="secreto")
+    def test_metricas(self):
+        self.assertEqual(self.client.get(reverse("metricas")).status_code, 401)
+        self.assertEqual(
+            self.client.get(reverse("metricas"), HTTP_AUTHORIZATION="Bearer otro").status_code, 401
+        )
+
+        response = self.medir("metricas", reverse("metricas"), HTTP_AUTHORIZATION="Bearer secreto")
+        texto = response.content.decode()
+        pendientes = PEDIDOS_ABIERTOS * ITEMS_POR_PEDIDO
+        self.assertIn(f'restaurante_cocina_items{{estado="por_atender"}} {pendientes // 2}.0', texto)
+        self.assertIn(f'restaurante_cocina_items{{estado="por_surtir"}} {pendientes // 2}.0', texto)
+        self.assertIn("restaurante_cocina_espera_maxima_segundos ", texto)
+        self.assertIn('restaurante_peticion_duracion_segundos_bucket{le="+Inf",metodo="GET"', texto)
+
+
+class ArchivarPedidosTests(TestCase):
+    def test_mueve_solo_pedidos_entregados_antiguos(self):
+        categoria = Categoria.objects.create(nombre="Bebidas")
+        producto = Producto.objects.create(categoria=categoria, nombre="Agua", precio=10)
+        mesa = Mesa.objects.create(nombre="Mesa 1")
+
+        viejo = Pedido.objects.create(mesa=mesa, entregado=True, confirmado=True, total=20)
+        PedidoItem.objects.create(pedido=viejo, producto=producto, cantidad=2)
+        reciente = Pedido.objects.create(mesa=mesa, entregado=True, confirmado=True)
+        abierto = Pedido.objects.create(mesa=mesa)
+        Pedido.objects.filter(id__in=[viejo.id, abierto.id]).update(
+            creado_en=timezone.now() - timedelta(days=60)
+        )
+
+        call_command("archivar_pedidos", "--dias", "30", "--lote", "1", stdout=StringIO())
+
+        self.assertEqual(
+            set(Pedido.objects.values_list("id", flat=True)), {reciente.id, abierto.id}
+        )
+        historico = PedidoHistorico.objects.get(id=viejo.id)
+        self.assertEqual(historico.total, Decimal("20"))
+        self.assertEqual(historico.items.get().subtotal(), Decimal("20"))
+
+
+class SubidaImagenesTests(CacheTestCase):
+    """La subida en segundo plano, con disco local en lugar de S3."""
+
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        raiz = Path(directorio.name)
+        ajustes = override_settings(
+            MEDIA_ROOT=str(raiz / "media"),
+            MEDIA_STAGING_ROOT=str(raiz / "espera"),
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+            },
+        )
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.raiz = raiz
+        self.categoria = Categoria.objects.create(nombre="Bebidas")
+
+    def imagen(self):
+        buffer = BytesIO()
+        Image.new("RGB", (1600, 1200), (180, 40, 40)).save(buffer, "JPEG")
+        return SimpleUploadedFile("foto.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+    def test_la_vista_deja_la_imagen_en_espera_y_el_worker_la_sube(self):
+        self.client.force_login(User.objects.create_superuser("admin", "a@example.com", "x"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("crear_producto"), {
+                "categoria": self.categoria.id,
+                "nombre": "Agua",
+                "precio": "10.00",
+                "imagen": self.imagen(),
+            })
+
+        producto = Producto.objects.get()
+        self.assertFalse(producto.imagen)
+        self.assertTrue((self.raiz / "espera" / producto.imagen_pendiente).exists())
+
+        self.assertEqual(subir_imagenes_pendientes(), 1)
+        producto.refresh_from_db()
+        self.assertEqual(producto.imagen_pendiente, "")
+        self.assertTrue((self.raiz / "media" / producto.imagen.name).exists())
+        self.assertFalse(producto.imagen_variantes)
+        self.assertFalse(any((self.raiz / "espera").iterdir()))
+
+        self.assertEqual(generar_variantes_pendientes(), 1)
+        producto.refresh_from_db()
+        self.assertTrue(producto.imagen_variantes)
+        self.assertTrue((self.raiz / "media" / nombre_variante(producto.imagen.name, "card", "webp")).exists())
+
+    def test_subir_otra_imagen_borra_la_que_seguia_en_espera(self):
+        self.client.force_login(User.objects.create_superuser("admin", "a@example.com", "x"))
+        datos = {"categoria": self.categoria.id, "nombre": "Agua", "precio": "10.00"}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("crear_producto"), {**datos, "imagen": self.imagen()})
+        producto = Producto.objects.get()
+        primera = producto.imagen_pendiente
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("editar_producto", args=[producto.id]), {**datos, "imagen": self.imagen()}
+            )
+
+        producto.refresh_from_db()
+        self.assertNotEqual(producto.imagen_pendiente, primera)
+        self.assertEqual(
+            [archivo.name for archivo in (self.raiz / "espera").iterdir()], [producto.imagen_pendiente]
+        )
+
+    def test_cambiar_la_imagen_fuera_del_formulario_deja_las_variantes_al_worker(self):
+        producto = Producto.objects.create(categoria=self.categoria, nombre="Agua", precio=10)
+        producto.imagen.save("foto.jpg", self.imagen(), save=False)
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            producto.save()
+        self.assertFalse(Producto.objects.get().imagen_variantes)
+        self.assertFalse((self.raiz / "media" / nombre_variante(producto.imagen.name, "card", "jpg")).exists())
+
+        self.assertEqual(generar_variantes_pendientes(), 1)
+        producto = Producto.objects.get()
+        self.assertTrue(producto.imagen_variantes)
+
+        # Guardar sin tocar la imagen conserva las variantes
+        producto.nombre = "Agua natural"
+        producto.save()
+        self.assertTrue(Producto.objects.get().imagen_variantes)
+
+
+    def test_una_imagen_corrupta_no_detiene_el_lote(self):
+        corrupta = Producto.objects.create(categoria=self.categoria, nombre="Agua", precio=10)
+        corrupta.imagen.save("rota.jpg", ContentFile(b"no es una imagen"))
+        buena = Producto.objects.create(categoria=self.categoria, nombre="Cafe", precio=15)
+        buena.imagen.save("foto.jpg", self.imagen())
+
+        fallidas = set()
+        with self.assertLogs("menu.imagenes", "ERROR"):
+            self.assertEqual(generar_variantes_pendientes(fallidas=fallidas), 1)
+
+        self.assertEqual(fallidas, {corrupta.pk})
+        self.assertFalse(Producto.objects.get(pk=corrupta.pk).imagen_variantes)
+        self.assertTrue(Producto.objects.get(pk=buena.pk).imagen_variantes)
+
+    def test_imagen_cambiada_durante_el_proceso_sigue_pendiente(self):
+        producto = Producto.objects.create(categoria=self.categoria, nombre="Agua", precio=10)
+        producto.imagen.save("foto.jpg", self.imagen())
+
+        def cambiar_imagen(nombre):
+            Producto.objects.filter(pk=producto.pk).update(imagen="productos/otra.jpg")
+
+        with mock.patch("menu.imagenes.generar_variantes", side_effect=cambiar_imagen):
+            generar_variantes_pendientes(limite=1)
+
+        self.assertFalse(Producto.objects.get().imagen_variantes)
+
+
+class HashedMediaStorageTests(SimpleTestCase):
+    def test_subidas_identicas_se_guardan_una_vez(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            storage = HashedMediaStorage(location=directorio)
+
+            primera = storage.save("productos/Foto.JPG", ContentFile(b"misma foto"))
+            segunda = storage.save("productos/copia.jpg", ContentFile(b"misma foto"))
+            distinta = storage.save("productos/otra.jpg", ContentFile(b"otra foto"))
+
+            self.assertEqual(primera, segunda)
+            self.assertNotEqual(primera, distinta)
+            self.assertTrue(primera.endswith(".jpg"))
+            self.assertEqual(len(os.listdir(os.path.join(directorio, "productos"))), 2)
+
+    def test_imagenes_existentes_siguen_en_el_prefijo_static(self):
+        storage = MediaStore(bucket_name="bucket", custom_domain="bucket.s3.amazonaws.com")
+        self.assertEqual(
+            storage.url("productos/tacos.jpg"),
+            "https://bucket.s3.amazonaws.com/static/productos/tacos.jpg",
+        )
+
+
+    def test_s3_no_consulta_exists_antes_de_subir(self):
+        storage = MediaStore(bucket_name="bucket")
+        with (
+            mock.patch.object(MediaStore, "exists") as exists,
+            mock.patch.object(MediaStore, "_save", side_effect=lambda nombre, contenido: nombre),
+        ):
+            nombre = storage.save("productos/foto.jpg", ContentFile(b"foto"))
+
+        exists.assert_not_called()
+        self.assertRegex(nombre, r"^productos/[0-9a-f]{64}\.jpg$")
+
+
+class StaticStoreTests(SimpleTestCase):
+    def test_solo_los_nombres_con_hash_son_inmutables(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            storage = StaticStore(
+                bucket_name="estaticos",
+                manifest_storage=FileSystemStorage(location=directorio),
+            )
+
+            con_hash = storage.get_object_parameters("styles/ui.c8ab2a12f27c.css")
+            original = storage.get_object_parameters("styles/ui.css")
+            manifiesto = storage.get_object_parameters("staticfiles.json")
+
+        self.assertIn("immutable", con_hash["CacheControl"])
+        self.assertNotIn("immutable", original["CacheControl"])
+        self.assertNotIn("immutable", manifiesto["CacheControl"])
+
+
+@override_settings(DATABASE_REPLICA="replica", REPLICA_PIN_SEGUNDOS=10)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def leer(self, request, modelo, escribir=False):
+        """Base que elige el router para ``modelo`` dentro de la petición."""
+        bases = []
+
+        def vista(request):
+            if escribir:
+                self.router.db_for_write(Producto)
+            bases.append(self.router.db_for_read(modelo))
+            return HttpResponse()
+
+        response = ReplicaMiddleware(vista)(request)
+        return bases[0], response
+
+    def test_get_lee_reportes_y_catalogo_de_la_replica(self):
+        self.assertEqual(self.leer(self.factory.get("/"), VentaDiaria)[0], "replica")
+        self.assertEqual(self.leer(self.factory.get("/"), Producto)[0], "replica")
+        self.assertIsNone(self.leer(self.factory.get("/"), Pedido)[0])
+
+    def test_despues_de_escribir_lee_de_la_primaria(self):
+        base, response = self.leer(self.factory.get("/"), Producto, escribir=True)
+        self.assertIsNone(base)
+        self.assertEqual(response.cookies[COOKIE_PRIMARIA]["max-age"], 10)
+
+        siguiente = self.factory.get("/dashboard/")
+        siguiente.COOKIES[COOKIE_PRIMARIA] = "1"
+        self.assertIsNone(self.leer(siguiente, VentaDiaria)[0])
+
+    def test_post_y_fuera_de_peticion_usan_la_primaria(self):
+        self.assertIsNone(self.leer(self.factory.post("/"), VentaDiaria)[0])
+        self.assertIsNone(self.router.db_for_read(VentaDiaria))
+
+    def test_catalogo_lee_de_la_primaria_sin_fijar_al_cliente(self):
+        bases = []
+
+        def vista(request):
+            bases.append(_categorias().db)
+            return HttpResponse()
+
+        response = ReplicaMiddleware(vista)(self.factory.get("/"))
+        self.assertEqual(bases, ["default"])
+        self.assertNotIn(COOKIE_PRIMARIA, response.cookies)
+
+    @override_settings(DATABASE_REPLICA=None)
+    def test_sin_replica_no_cambia_nada(self):
+        base, response = self.leer(self.factory.get("/"), VentaDiaria, escribir=True)
+        self.assertIsNone(base)
+        self.assertNotIn(COOKIE_PRIMARIA, response.cookies)
+
+
+class SimuladorPrepararTests(TestCase):
+    def test_preparar_salta_nombres_existentes(self):
+        Mesa.objects.bulk_create([Mesa(nombre="sim-0"), Mesa(nombre="sim-2")])
+        SimularTurno()._preparar(4)
+        self.assertEqual(
+            sorted(Mesa.objects.values_list("nombre", flat=True)),
+            ["sim-0", "sim-1", "sim-2", "sim-3"],
+        )
+
+
+class SimuladorTests(SimpleTestCase):
+    def test_respuesta_chunked(self):
+        respuesta = leer_respuesta(
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\nSet-Cookie: a=1\r\n\r\n"
+            b"4\r\nhola\r\n6\r\n mundo\r\n0\r\n\r\n"
+        )
+        self.assertEqual(respuesta.estado, 200)
+        self.assertEqual(respuesta.texto, "hola mundo")
+        self.assertIn(("set-cookie", "a=1"), respuesta.cabeceras)
+
+    def test_estadisticas_por_endpoint(self):
+        estadisticas = Estadisticas()
+        for ms in range(1, 101):
+            estadisticas.registrar("GET", "/cocina/json/?since=3", 200, ms)
+        estadisticas.registrar("GET", "/item/1/atender/", 404, 5)
+
+        resumen = estadisticas.resumen(duracion=10)
+
+        self.assertEqual(resumen["pedidos_cocina_json"]["peticiones"], 100)
+        self.assertEqual(resumen["pedidos_cocina_json"]["req_s"], 10)
+        self.assertEqual(resumen["pedidos_cocina_json"]["p99_ms"], 100)
+        self.assertEqual(resumen["atender_item"]["errores"], 1)
+
+
+class RendimientoTests(CacheTestCase):
+    def test_server_timing_y_registro(self):
+        Mesa.objects.create(nombre="Mesa 1")
+        response = self.client.get(reverse("seleccionar_mesa"))
+
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="SQL \(1\)", tpl;dur=[\d.]+, total;dur=[\d.]+$',
+        )
+        registro = peticiones_recientes()[-1]
+        self.assertEqual(registro["vista"], "seleccionar_mesa")
+        self.assertEqual(registro["consultas"], 1)
+        self.assertGreater(registro["plantillas_ms"], 0)
+
+    @override_settings(RENDIMIENTO_LENTO_MS=0)
+    def test_peticion_lenta_va_al_log(self):
+        with self.assertLogs("restaurante.rendimiento", "WARNING") as logs:
+            self.client.get(reverse("seleccionar_mesa"))
+        registro = json.loads(logs.records[0].getMessage().split(" ", 1)[1])
+        self.assertEqual(registro["ruta"], reverse("seleccionar_mesa"))
+
+    def test_vista_solo_para_staff(self):
+        response = self.client.get(reverse("rendimiento"))
+        self.assertEqual(response.status_code, 302)
+
+
+class MetricasPedidosTests(TestCase):
+    def contador(self, evento):
+        return REGISTRO.get_sample_value("restaurante_pedidos_total", {"evento": evento})
+
+    def test_cuenta_pedidos_creados_confirmados_y_cerrados(self):
+        antes = {evento: self.contador(evento) for evento in ("creado", "confirmado", "cerrado")}
+        mesa = Mesa.objects.create(nombre="Mesa 1")
+        producto = Producto.objects.create(
+            categoria=Categoria.objects.create(nombre="Bebidas"), nombre="Agua", precio=10
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("agregar_al_pedido", args=[mesa.id, producto.id]))
+        pedido = Pedido.objects.get(mesa=mesa)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("confirmar_pedido", args=[mesa.id, pedido.id]))
+        self.assertIsNotNone(pedido.items.get().confirmado_en)
+
+        pedido.items.update(atendido=True, surtido=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse("generar_ticket", args=[mesa.id, pedido.id]))
+
+        for evento in ("creado", "confirmado", "cerrado"):
+            self.assertEqual(self.contador(evento), antes[evento] + 1, evento)
+
+
+class CocinaJsonTests(CacheTestCase):
+    def test_sin_cambios_responde_304(self):
+        response = self.client.get(reverse("pedidos_cocina_json"))
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(
+            reverse("pedidos_cocina_json"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_since_devuelve_solo_los_pedidos_que_cambiaron(self):
+        mesa = Mesa.objects.create(nombre="Mesa 1")
+        producto = Producto.objects.create(
+            categoria=Categoria.objects.create(nombre="Bebidas"), nombre="Agua", precio=10
+        )
+        pedido = Pedido.objects.create(mesa=mesa, confirmado=True)
+        item = PedidoItem.objects.create(pedido=pedido, producto=producto, confirmado=True)
+        otro = Pedido.objects.create(mesa=Mesa.objects.create(nombre="Mesa 2"), confirmado=True)
+        version = self.client.get(reverse("pedidos_cocina_json")).json()["version"]
+
+        self.client.get(reverse("atender_item", args=[item.id]))
+        datos = self.client.get(reverse("pedidos_cocina_json") + f"?since={version}").json()
+
+        self.assertEqual(datos["version"], version + 1)
+        self.assertEqual(list(datos["pedidos"]), [str(pedido.id)])
+        self.assertNotIn(str(otro.id), datos["pedidos"])
+        self.assertEqual(
+            datos["items"],
+            [{"id": item.id, "pedido": pedido.id, "atendido": True, "surtido": False}],
+        )
+        self.assertEqual(datos["eliminados"], [])
+
+    def test_atender_se_revierte_si_falla_el_evento(self):
+        producto = Producto.objects.create(
+            categoria=Categoria.objects.create(nombre="Bebidas"), nombre="Agua", precio=10
+        )
+        pedido = Pedido.objects.create(mesa=Mesa.objects.create(nombre="Mesa 1"), confirmado=True)
+        item = PedidoItem.objects.create(pedido=pedido, producto=producto, confirmado=True)
+
+        with mock.patch("menu.views.registrar_evento_cocina", side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.get(reverse("atender_item", args=[item.id]))
+
+        item.refresh_from_db()
+        self.assertFalse(item.atendido)
+
+    def test_stream_solo_con_asgi(self):
+        response = self.client.get(reverse("pedidos_cocina_stream"))
+        self.assertEqual(response.status_code, 204)
+
+        response = async_to_sync(self.async_client.get)(reverse("pedidos_cocina_stream"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+    def test_since_desconocido_devuelve_la_lista_completa(self):
+        datos = self.client.get(reverse("pedidos_cocina_json") + "?since=999999").json()
+        self.assertIn("html", datos)
+
+    def test_eventos_se_publican_en_orden_y_solo_al_confirmar(self):
+        inicial = version_cocina()
+        registrar_evento_cocina("atendido", 1, 10)
+        try:
+            with transaction.atomic():
+                registrar_evento_cocina("surtido", 1, 10)
+                raise IntegrityError
+        except IntegrityError:
+            pass
+        registrar_evento_cocina("surtido", 1, 10)
+
+        eventos = async_to_sync(aeventos_desde)(inicial, version_cocina())
+        self.assertEqual(
+            [(evento["version"], evento["tipo"]) for evento in eventos],
+            [(inicial + 1, "atendido"), (inicial + 2, "surtido")],
+        )
+
+    @mock.patch("menu.cocina.STREAM_INTERVALO", 0.01)
+    def test_un_solo_sondeo_para_todas_las_pantallas(self):
+        async def escuchar(pantallas):
+            streams = [stream_eventos_cocina() for _ in range(pantallas)]
+            for stream in streams:
+                await anext(stream)
+            await sync_to_async(registrar_evento_cocina)("atendido", 1, 10)
+            mensajes = [await asyncio.wait_for(anext(stream), 5) for stream in streams]
+            for stream in streams:
+                await stream.aclose()
+            return mensajes
+
+        with CaptureQueriesContext(connection) as consultas:
+            mensajes = async_to_sync(escuchar)(3)
+
+        self.assertEqual(len(set(mensajes)), 1)
+        self.assertIn('"tipo": "atendido"', mensajes[0])
+        lecturas = [q for q in consultas if q["sql"].startswith("SELECT") and "menu_eventococina" in q["sql"]]
+        self.assertEqual(len(lecturas), 1)
+
+
+class VersionesTests(CacheTestCase):
+    def test_version_descartada_no_vuelve_a_un_numero_usado(self):
+        incrementar_version("prueba:version")
+        usada = version_actual("prueba:version")
+        cache.delete("prueba:version")
+        time.sleep(0.001)
+        self.assertGreater(version_actual("prueba:version"), usada)
+
+
+class CatalogoTests(CacheTestCase):
+    def test_guardar_un_producto_invalida_el_catalogo(self):
+        categoria = Categoria.objects.create(nombre="Bebidas")
+        with self.captureOnCommitCallbacks(execute=True):
+            producto = Producto.objects.create(categoria=categoria, nombre="Agua", precio=10)
+        anterior = obtener_catalogo()
+        with self.assertNumQueries(0):
+            self.assertEqual(obtener_catalogo(), anterior)
+
+        producto.precio = 12
+        with self.captureOnCommitCallbacks(execute=True):
+            producto.save()
+
+        catalogo = obtener_catalogo()
+        self.assertGreater(catalogo.version, anterior.version)
+        self.assertEqual(catalogo.categorias[0].productos[0].precio, 12)
+
+
+class PedidosTests(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        categoria = Categoria.objects.create(nombre="Bebidas")
+        self.mesa = Mesa.objects.create(nombre="Mesa 1")
+        self.agua = Producto.objects.create(categoria=categoria, nombre="Agua", precio=Decimal("10.00"))
+        self.cafe = Producto.objects.create(categoria=categoria, nombre="Café", precio=Decimal("15.50"))
+
+    def agregar(self, producto):
+        self.client.post(reverse("agregar_al_pedido", args=[self.mesa.id, producto.id]))
+        return Pedido.objects.get(mesa=self.mesa, entregado=False)
+
+    def test_total_se_mantiene_al_agregar_y_quitar(self):
+        self.agregar(self.agua)
+        pedido = self.agregar(self.cafe)
+        self.assertEqual(pedido.total, Decimal("25.50"))
+
+        item = pedido.items.get(producto=self.agua)
+        self.client.post(reverse("eliminar_item_pedido", args=[self.mesa.id, item.id]))
+        pedido.refresh_from_db()
+        self.assertEqual(pedido.total, Decimal("15.50"))
+        self.assertEqual(pedido.calcular_total(), Decimal("15.50"))
+
+    def test_lote_suma_lineas_repetidas(self):
+        url = reverse("agregar_lote_al_pedido", args=[self.mesa.id])
+        primero = self.client.post(url, json.dumps({"items": [
+            {"producto": self.agua.id, "cantidad": 2},
+            {"producto": self.agua.id},
+            {"producto": self.cafe.id, "observaciones": "sin azúcar"},
+        ]}), content_type="application/json").json()
+        self.assertEqual((primero["lineas"], primero["nuevas"]), (2, 2))
+
+        segundo = self.client.post(url, json.dumps({"items": [
+            {"producto": self.agua.id, "cantidad": 1},
+            {"producto": self.cafe.id},
+        ]}), content_type="application/json").json()
+        self.assertEqual(segundo["nuevas"], 1)
+
+        pedido = Pedido.objects.get(pk=primero["pedido"])
+        lineas = sorted(pedido.items.values_list("nombre_producto", "observaciones", "cantidad"))
+        self.assertEqual(lineas, [
+            ("Agua", "con todo", 4),
+            ("Café", "con todo", 1),
+            ("Café", "sin azúcar", 1),
+        ])
+        self.assertEqual(pedido.total, Decimal("71.00"))
+
+    def test_lote_rechaza_observaciones_demasiado_largas(self):
+        response = self.client.post(
+            reverse("agregar_lote_al_pedido", args=[self.mesa.id]),
+            json.dumps({"items": [
+                {"producto": self.agua.id},
+                {"producto": self.cafe.id, "observaciones": "x" * 256},
+            ]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("observaciones", response.json()["error"])
+        self.assertFalse(PedidoItem.objects.exists())
+
+    def test_cambiar_el_precio_no_modifica_pedidos_existentes(self):
+        pedido = self.agregar(self.agua)
+        self.agua.precio = Decimal("12.00")
+        self.agua.nombre = "Agua mineral"
+        self.agua.save()
+
+        item = pedido.items.get()
+        self.assertEqual((item.precio_unitario, item.nombre_producto), (Decimal("10.00"), "Agua"))
+        self.assertEqual(pedido.calcular_total(), Decimal("10.00"))
+
+        pedido = self.agregar(self.agua)
+        self.assertEqual(pedido.total, Decimal("22.00"))
+
+    def test_una_mesa_no_puede_tener_dos_pedidos_abiertos(self):
+        Pedido.objects.create(mesa=self.mesa)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Pedido.objects.create(mesa=self.mesa)
+
+        Pedido.objects.filter(mesa=self.mesa).update(entregado=True)
+        Pedido.objects.create(mesa=self.mesa)
+        self.assertEqual(Pedido.objects.filter(mesa=self.mesa, entregado=False).count(), 1)
+
+
+class VentasTests(TestCase):
+    def test_registrar_suma_en_la_fila_del_dia(self):
+        fecha = date(2025, 3, 14)
+        VentaDiaria.registrar(Decimal("100.00"), fecha)
+        VentaDiaria.registrar(Decimal("50.50"), fecha)
+
+        fila = VentaDiaria.objects.get(fecha=fecha)
+        self.assertEqual((fila.caja, fila.total), (0, Decimal("150.50")))
+
+    @override_settings(VENTAS_CAJAS=4)
+    def test_cada_worker_suma_en_su_caja(self):
+        fecha = date(2025, 3, 14)
+        for pid in (8, 9, 12):
+            with mock.patch("menu.models.os.getpid", return_value=pid):
+                VentaDiaria.registrar(Decimal("10.00"), fecha)
+
+        cajas = dict(VentaDiaria.objects.filter(fecha=fecha).values_list("caja", "total"))
+        self.assertEqual(cajas, {0: Decimal("20.00"), 1: Decimal("10.00")})
+
+    def test_acumulados_por_semana_mes_y_año(self):
+        # Viernes 28 y lunes 31 de marzo, martes 1 de abril de 2025
+        ventas = (
+            (date(2025, 3, 28), "10.00"),
+            (date(2025, 3, 31), "20.00"),
+            (date(2025, 4, 1), "5.00"),
+        )
+        for dia, monto in ventas:
+            VentaDiaria.registrar(Decimal(monto), dia)
+
+        def totales(tipo):
+            return {fila["periodo"]: fila["total"] for fila in VentaAcumulada.por_periodo(tipo)}
+
+        self.assertEqual(totales(VentaAcumulada.SEMANA), {
+            date(2025, 3, 24): Decimal("10.00"),
+            date(2025, 3, 31): Decimal("25.00"),
+        })
+        self.assertEqual(totales(VentaAcumulada.MES), {
+            date(2025, 3, 1): Decimal("30.00"),
+            date(2025, 4, 1): Decimal("5.00"),
+        })
+        self.assertEqual(totales(VentaAcumulada.ANO), {date(2025, 1, 1): Decimal("35.00")})
+
+
+class DashboardCacheTests(CacheTestCase):
+    def test_una_venta_invalida_el_dashboard_en_cache(self):
+        VentaDiaria.registrar(Decimal("100.00"))
+        self.assertEqual(self.client.get(reverse("dashboard")).context["total_general_label"], "$100.00")
+        with self.assertNumQueries(0):
+            self.client.get(reverse("dashboard"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            VentaDiaria.registrar(Decimal("25.00"))
+
+        self.assertEqual(self.client.get(reverse("dashboard")).context["total_general_label"], "$125.00")
+
+
+class TableroTests(CacheTestCase):
+    def test_crear_y_borrar_mesas_invalida_el_tablero(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            mesa = Mesa.objects.create(nombre="Mesa 1")
+        self.assertEqual([m.nombre for m in tablero_mesas()], ["Mesa 1"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            nueva = Mesa.objects.create(nombre="Mesa 2")
+        self.assertEqual([m.nombre for m in tablero_mesas()], ["Mesa 1", "Mesa 2"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("borrar_mesa", args=[nueva.id]))
+        self.assertEqual([m.id for m in tablero_mesas()], [mesa.id])
@@ -8,6 +8,7 @@ urlpatterns = [
 
     # Menú por mesa
     path("mesa/<int:mesa_id>/", views.menu_view, name="menu"),
+    path("mesa/<int:mesa_id>/agregar/", views.agregar_lote_al_pedido, name="agregar_lote_al_pedido"),
     path("mesa/<int:mesa_id>/agregar/<int:producto_id>/", views.agregar_al_pedido, name="agregar_al_pedido"),
     path("mesa/<int:mesa_id>/eliminar/<int:item_id>/", views.eliminar_item_pedido, name="eliminar_item_pedido"),
     path("mesa/<int:mesa_id>/confirmar/<int:pedido_id>/", views.confirmar_pedido, name="confirmar_pedido"),
@@ -16,6 +17,7 @@ urlpatterns = [
     # Cocina
     path("cocina/", views.pedidos_cocina, name="cocina"),
     path("cocina/json/", views.pedidos_cocina_json, name="pedidos_cocina_json"),
+    path("cocina/stream/", views.pedidos_cocina_stream, name="pedidos_cocina_stream"),
     path("item/<int:item_id>/atender/", views.atender_item, name="atender_item"),
     path("item/<int:item_id>/surtir/", views.surtir_item, name="surtir_item"),
 
@@ -33,6 +35,12 @@ urlpatterns = [
 
     # CRUD Mesas
     path("mesas/", views.listar_mesas, name="listar_mesas"),
+    path("mesas/tablero/", views.tablero_mesas_json, name="tablero_mesas_json"),
     path("mesas/crear/", views.crear_mesa, name="crear_mesa"),
     path("mesas/<int:mesa_id>/borrar/", views.borrar_mesa, name="borrar_mesa"),
+
+    # Rendimiento
+    path("rendimiento/", views.rendimiento, name="rendimiento"),
+    # Sin barra final: es la ruta que Prometheus busca por defecto
+    path("metrics", views.metricas, name="metricas"),
 ]
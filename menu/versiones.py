@@ -0,0 +1,36 @@
+import time
+
+from django.core.cache import cache
+
+
+def _version_inicial():
+    # Microsegundos actuales: si la cache descarta la clave, la versión nueva
+    # queda por encima de todas las usadas antes y nunca revive entradas viejas
+    return time.time_ns() // 1000
+
+
+def version_actual(clave):
+    """Versión guardada en la cache compartida."""
+    version = cache.get(clave)
+    if version is None:
+        cache.add(clave, _version_inicial(), timeout=None)
+        version = cache.get(clave) or _version_inicial()
+    return version
+
+
+def incrementar_version(clave):
+    """Invalida todo lo guardado bajo la versión anterior."""
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        version = _version_inicial()
+        cache.set(clave, version, timeout=None)
+        return version
+
+
+async def aversion_actual(clave):
+    version = await cache.aget(clave)
+    if version is None:
+        await cache.aadd(clave, _version_inicial(), timeout=None)
+        version = await cache.aget(clave) or _version_inicial()
+    return version
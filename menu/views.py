@@ -1,134 +1,282 @@
 import calendar
 import json
+import os
 from datetime import date, timedelta
 
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, quote_etag
 from django.utils.timezone import now
 from django.contrib import messages
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
-from django.db.models import Sum
-from django.db.models.functions import TruncDay, TruncMonth, TruncYear
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDay
+from prometheus_client import CONTENT_TYPE_LATEST
 
-from .models import Categoria, Producto, Pedido, PedidoItem, Mesa, VentaDiaria
+from restaurante.metricas import contar_pedido, exponer, puede_ver_metricas
+from restaurante.rendimiento import peticiones_recientes, resumen_por_vista
+
+from .models import Categoria, Producto, Pedido, PedidoItem, Mesa, VentaAcumulada, VentaDiaria
 from .forms import CategoriaForm, ProductoForm, MesaForm
+from .catalogo import aobtener_catalogo, obtener_catalogo
+from .reportes import aobtener_dashboard
+from .tablero import tablero_json, tablero_mesas
+from .cocina import (
+    ColaCocinaCollector,
+    aeventos_desde,
+    aversion_cocina,
+    registrar_evento_cocina,
+    stream_eventos_cocina,
+    version_cocina,
+)
+
+
+MAX_CANTIDAD_LINEA = 99
+MAX_OBSERVACIONES = PedidoItem._meta.get_field("observaciones").max_length
+RENDIMIENTO_PEORES = 25
 
 
 # =====================
 # Selección de mesa
 # =====================
 def seleccionar_mesa(request):
-    mesas = Mesa.objects.all()
+    mesas = tablero_mesas()
     return render(request, "menu/seleccionar_mesa.html", {"mesas": mesas})
 
 
+def tablero_mesas_json(request):
+    return JsonResponse({"mesas": tablero_json(tablero_mesas())})
+
+
 # =====================
 # Menú y pedidos
 # =====================
-def menu_view(request, mesa_id):
-    mesa = get_object_or_404(Mesa, id=mesa_id)
-    categorias = Categoria.objects.prefetch_related("productos").all()
-
-    pedido, _ = Pedido.objects.get_or_create(
+# Las vistas async cargan todo antes de render(): la plantilla no debe
+# consultar la base de datos desde el event loop.
+async def menu_view(request, mesa_id):
+    mesa = await Mesa.objects.filter(id=mesa_id).afirst()
+    if mesa is None:
+        raise Http404("No existe la mesa.")
+    categorias = await aobtener_catalogo()
+
+    pedido, _ = await Pedido.objects.aget_or_create(
         mesa=mesa,
         entregado=False
     )
-
-    pedido.calcular_total()
+    items = [item async for item in pedido.items.all()]
 
     # ✅ Revisar si todos los items ya fueron surtidos
-    todos_entregados = not pedido.items.filter(surtido=False).exists()
+    todos_entregados = all(item.surtido for item in items)
 
     return render(request, "menu/menu.html", {
         "categorias": categorias,
         "pedido": pedido,
+        "items": items,
         "mesa": mesa,
         "todos_entregados": todos_entregados,
     })
 
 
+def _bloquear_mesa(mesa_id):
+    """Bloquea la mesa hasta el fin de la transacción.
+
+    Todas las mutaciones de pedidos de una mesa pasan por aquí, así dos
+    meseros (o un doble toque) sobre la misma mesa se ejecutan en serie.
+    """
+    return get_object_or_404(Mesa.objects.select_for_update(), id=mesa_id)
+
+
 def agregar_al_pedido(request, mesa_id, producto_id):
-    mesa = get_object_or_404(Mesa, id=mesa_id)
     producto = get_object_or_404(Producto, id=producto_id)
 
-    pedido, _ = Pedido.objects.get_or_create(
-        mesa=mesa,
-        entregado=False
-    )
-
     observaciones = request.POST.get("observaciones", "").strip()
     if not observaciones:
         observaciones = "con todo"
 
-    # 🚨 Siempre crear un nuevo item
-    PedidoItem.objects.create(
-        pedido=pedido,
-        producto=producto,
-        observaciones=observaciones,
-        cantidad=1,
-        confirmado=False
-    )
-
-    # 🚨 Si ya estaba confirmado, volver a marcarlo como NO confirmado
-    if pedido.confirmado:
-        pedido.confirmado = False
-        pedido.save()
+    with transaction.atomic():
+        mesa = _bloquear_mesa(mesa_id)
+        pedido, _ = Pedido.objects.get_or_create(
+            mesa=mesa,
+            entregado=False
+        )
+
+        # 🚨 Siempre crear un nuevo item
+        PedidoItem.objects.create(
+            pedido=pedido,
+            producto=producto,
+            observaciones=observaciones,
+            cantidad=1,
+            confirmado=False
+        )
+        pedido.ajustar_total(producto.precio)
+
+        # 🚨 Si ya estaba confirmado, volver a marcarlo como NO confirmado
+        if pedido.confirmado:
+            pedido.confirmado = False
+            pedido.save(update_fields=["confirmado"])
+            registrar_evento_cocina("reabierto", pedido.id)
 
     return redirect("menu", mesa_id=mesa.id)
 
 
-def eliminar_item_pedido(request, mesa_id, item_id):
-    item = get_object_or_404(PedidoItem, id=item_id, pedido__mesa_id=mesa_id)
+def _leer_lineas_pedido(request):
+    """Agrupa las líneas recibidas por (producto, observaciones)."""
+    try:
+        datos = json.loads(request.body or b"{}")
+        lineas = datos["items"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Se esperaba un JSON con la lista 'items'")
 
-    if item.confirmado:
-        return redirect("menu", mesa_id=mesa_id)
+    if not isinstance(lineas, list) or not lineas:
+        raise ValueError("La lista 'items' está vacía")
 
-    if item.cantidad > 1:
-        item.cantidad -= 1
-        item.save()
-    else:
-        item.delete()
+    agrupadas = {}
+    for linea in lineas:
+        try:
+            producto_id = int(linea["producto"])
+            cantidad = int(linea.get("cantidad", 1))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValueError("Cada item necesita 'producto' y 'cantidad' numéricos")
+        if not 1 <= cantidad <= MAX_CANTIDAD_LINEA:
+            raise ValueError(f"La cantidad debe estar entre 1 y {MAX_CANTIDAD_LINEA}")
+
+        observaciones = str(linea.get("observaciones") or "").strip() or "con todo"
+        if len(observaciones) > MAX_OBSERVACIONES:
+            raise ValueError(f"Las observaciones no pueden pasar de {MAX_OBSERVACIONES} caracteres")
+        clave = (producto_id, observaciones)
+        agrupadas[clave] = agrupadas.get(clave, 0) + cantidad
+
+    return agrupadas
+
+
+@require_http_methods(["POST"])
+def agregar_lote_al_pedido(request, mesa_id):
+    try:
+        lineas = _leer_lineas_pedido(request)
+    except ValueError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+
+    productos = Producto.objects.in_bulk({producto_id for producto_id, _ in lineas})
+    faltantes = sorted({producto_id for producto_id, _ in lineas} - set(productos))
+    if faltantes:
+        return JsonResponse({"error": f"Productos inexistentes: {faltantes}"}, status=400)
+
+    with transaction.atomic():
+        mesa = _bloquear_mesa(mesa_id)
+        pedido, _ = Pedido.objects.get_or_create(
+            mesa=mesa,
+            entregado=False
+        )
+
+        # Las líneas aún no confirmadas con el mismo producto, precio y
+        # observaciones se suman
+        existentes = {
+            (item.producto_id, item.observaciones, item.precio_unitario): item
+            for item in pedido.items.filter(confirmado=False)
+        }
+        nuevos = []
+        monto = 0
+        for (producto_id, observaciones), cantidad in lineas.items():
+            producto = productos[producto_id]
+            monto += producto.precio * cantidad
+            item = existentes.get((producto_id, observaciones, producto.precio))
+            if item is not None:
+                PedidoItem.objects.filter(pk=item.pk).update(cantidad=F("cantidad") + cantidad)
+            else:
+                # bulk_create no llama a save(): la copia del producto va explícita
+                nuevos.append(PedidoItem(
+                    pedido=pedido,
+                    producto=producto,
+                    observaciones=observaciones,
+                    cantidad=cantidad,
+                    precio_unitario=producto.precio,
+                    nombre_producto=producto.nombre,
+                    confirmado=False,
+                ))
+
+        PedidoItem.objects.bulk_create(nuevos)
+        pedido.ajustar_total(monto)
+
+        if pedido.confirmado:
+            pedido.confirmado = False
+            pedido.save(update_fields=["confirmado"])
+            registrar_evento_cocina("reabierto", pedido.id)
+
+    return JsonResponse({
+        "pedido": pedido.id,
+        "total": str(pedido.total),
+        "lineas": len(lineas),
+        "nuevas": len(nuevos),
+    })
+
+
+def eliminar_item_pedido(request, mesa_id, item_id):
+    with transaction.atomic():
+        _bloquear_mesa(mesa_id)
+        item = get_object_or_404(
+            PedidoItem.objects.select_related("pedido"),
+            id=item_id,
+            pedido__mesa_id=mesa_id,
+        )
+
+        if item.confirmado:
+            return redirect("menu", mesa_id=mesa_id)
+
+        if item.cantidad > 1:
+            PedidoItem.objects.filter(pk=item.pk).update(cantidad=F("cantidad") - 1)
+        else:
+            item.delete()
+        item.pedido.ajustar_total(-item.precio_unitario)
 
     return redirect("menu", mesa_id=mesa_id)
 
 
 def confirmar_pedido(request, mesa_id, pedido_id):
-    mesa = get_object_or_404(Mesa, id=mesa_id)
-    pedido = get_object_or_404(Pedido, id=pedido_id, mesa=mesa, confirmado=False)
+    if request.method != "POST":
+        get_object_or_404(Pedido, id=pedido_id, mesa_id=mesa_id, confirmado=False)
+        return redirect("menu", mesa_id=mesa_id)
 
-    if request.method == "POST":
-        pedido.items.filter(confirmado=False).update(confirmado=True)
-        pedido.calcular_total()
+    with transaction.atomic():
+        mesa = _bloquear_mesa(mesa_id)
+        pedido = get_object_or_404(Pedido, id=pedido_id, mesa=mesa, confirmado=False)
+
+        pedido.items.filter(confirmado=False).update(confirmado=True, confirmado_en=now())
         pedido.confirmado = True
         mesa.ocupada = True
-        mesa.save()
-        pedido.save()
+        mesa.save(update_fields=["ocupada"])
+        pedido.save(update_fields=["confirmado"])
+        registrar_evento_cocina("confirmado", pedido.id)
+        contar_pedido("confirmado")
 
     return redirect("menu", mesa_id=mesa.id)
 
 
 def generar_ticket(request, mesa_id, pedido_id):
-    mesa = get_object_or_404(Mesa, id=mesa_id)
-    pedido = get_object_or_404(Pedido, id=pedido_id, mesa=mesa, confirmado=True, entregado=False)
+    with transaction.atomic():
+        # El bloqueo evita que un doble toque sume el ticket dos veces
+        mesa = _bloquear_mesa(mesa_id)
+        pedido = get_object_or_404(Pedido, id=pedido_id, mesa=mesa, confirmado=True, entregado=False)
 
-    # 🚨 Solo permitir si todos los items están surtidos
-    if pedido.items.filter(surtido=False).exists():
-        return redirect("menu", mesa_id=mesa.id)
+        # 🚨 Solo permitir si todos los items están surtidos
+        if pedido.items.filter(surtido=False).exists():
+            return redirect("menu", mesa_id=mesa.id)
 
-    pedido.calcular_total()
-    pedido.entregado = True
-    pedido.save()
+        pedido.entregado = True
+        pedido.save(update_fields=["entregado"])
 
-    mesa.ocupada = False
-    mesa.save()
+        mesa.ocupada = False
+        mesa.save(update_fields=["ocupada"])
+        registrar_evento_cocina("cerrado", pedido.id)
+        contar_pedido("cerrado")
 
-    fecha_hoy = now().date()
-    venta, _ = VentaDiaria.objects.get_or_create(fecha=fecha_hoy)
-    venta.total += pedido.total
-    venta.save()
+        VentaDiaria.registrar(pedido.total)
 
     return render(request, "menu/ticket.html", {"pedido": pedido})
 
@@ -138,36 +286,105 @@ def generar_ticket(request, mesa_id, pedido_id):
 # =====================
 # Cocina
 # =====================
-def pedidos_cocina(request):
-    pedidos = (
+def _pedidos_en_cocina():
+    return (
         Pedido.objects.filter(confirmado=True, entregado=False)
         .select_related("mesa")
-        .prefetch_related("items__producto")
+        .prefetch_related("items")
     )
-    return render(request, "menu/cocina.html", {"pedidos": pedidos})
 
 
-def pedidos_cocina_json(request):
-    pedidos = (
-        Pedido.objects.filter(confirmado=True, entregado=False)
-        .select_related("mesa")
-        .prefetch_related("items__producto")
+def pedidos_cocina(request):
+    pedidos = _pedidos_en_cocina()
+    return render(request, "menu/cocina.html", {
+        "pedidos": pedidos,
+        "version": version_cocina(),
+    })
+
+
+async def pedidos_cocina_json(request):
+    version = await aversion_cocina()
+    # ETag a mano: el decorador @etag consultaría la versión de forma
+    # síncrona dentro del event loop
+    etag = quote_etag(f"cocina-{version}")
+    no_modificado = get_conditional_response(request, etag=etag)
+    if no_modificado is not None:
+        return no_modificado
+
+    desde = request.GET.get("since", "")
+    eventos = await aeventos_desde(int(desde), version) if desde.isdigit() else None
+
+    # Sin cursor válido (o eventos ya expirados): lista completa
+    if eventos is None:
+        pedidos = [pedido async for pedido in _pedidos_en_cocina()]
+        html = render_to_string("menu/pedidos_list.html", {"pedidos": pedidos})
+        response = JsonResponse({"version": version, "html": html})
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"
+        return response
+
+    pedido_ids = {evento["pedido"] for evento in eventos if evento["pedido"] is not None}
+    item_ids = {evento["item"] for evento in eventos if evento["item"] is not None}
+    pedidos = [pedido async for pedido in _pedidos_en_cocina().filter(id__in=pedido_ids)]
+
+    response = JsonResponse({
+        "version": version,
+        "pedidos": {
+            pedido.id: render_to_string("menu/pedido_cocina.html", {"pedido": pedido})
+            for pedido in pedidos
+        },
+        "items": [
+            {
+                "id": item.id,
+                "pedido": pedido.id,
+                "atendido": item.atendido,
+                "surtido": item.surtido,
+            }
+            for pedido in pedidos
+            for item in pedido.items.all()
+            if item.id in item_ids
+        ],
+        "eliminados": sorted(pedido_ids - {pedido.id for pedido in pedidos}),
+    })
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+async def pedidos_cocina_stream(request):
+    # Server-Sent Events: solo se envía algo cuando cambia un pedido en cocina
+    if not isinstance(request, ASGIRequest):
+        # Con WSGI cada stream retendría un worker entero durante
+        # STREAM_DURACION. 204 hace que EventSource no se reconecte y la
+        # pantalla pase a sondear pedidos_cocina_json.
+        return HttpResponse(status=204)
+
+    ultimo_id = request.headers.get("Last-Event-ID", "")
+    desde = int(ultimo_id) if ultimo_id.isdigit() else None
+
+    response = StreamingHttpResponse(
+        stream_eventos_cocina(desde), content_type="text/event-stream"
     )
-    html = render_to_string("menu/pedidos_list.html", {"pedidos": pedidos})
-    return JsonResponse({"html": html})
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 def atender_item(request, item_id):
     item = get_object_or_404(PedidoItem, id=item_id, confirmado=True, atendido=False)
     item.atendido = True
-    item.save()
+    with transaction.atomic():
+        item.save(update_fields=["atendido"])
+        registrar_evento_cocina("atendido", item.pedido_id, item.id)
     return redirect("cocina")
 
 
 def surtir_item(request, item_id):
     item = get_object_or_404(PedidoItem, id=item_id, confirmado=True, atendido=True, surtido=False)
     item.surtido = True
-    item.save()
+    with transaction.atomic():
+        item.save(update_fields=["surtido"])
+        registrar_evento_cocina("surtido", item.pedido_id, item.id)
     return redirect("cocina")
 
 
@@ -199,42 +416,18 @@ def _periodo_label(periodo, filtro):
     return _fecha_corta(inicio)
 
 
-def _ventas_por_semana_desde_enero(ventas):
-    semanas = {}
+async def _sumar_ventas(ventas):
+    return (await ventas.aaggregate(total=Sum("total")))["total"] or 0
 
-    for venta in ventas:
-        # ISO 8601: Semana comienza lunes (1) y termina domingo (7)
-        ano_iso, numero_semana, _ = venta.fecha.isocalendar()
-        
-        # Calcular el lunes de la semana ISO
-        inicio = date.fromisocalendar(ano_iso, numero_semana, 1)  # 1 = lunes
-        fin = date.fromisocalendar(ano_iso, numero_semana, 7)     # 7 = domingo
-        
-        clave = (ano_iso, numero_semana)
 
-        if clave not in semanas:
-            semanas[clave] = {
-                "periodo": {"inicio": inicio, "fin": fin, "numero": numero_semana},
-                "total": 0,
-            }
-
-        semanas[clave]["total"] += venta.total
-
-    return [semanas[clave] for clave in sorted(semanas)]
-
-
-def _sumar_ventas(ventas):
-    return ventas.aggregate(total=Sum("total"))["total"] or 0
-
-
-def _consulta_total_ventas(request, ventas):
+async def _consulta_total_ventas(request, ventas):
     hoy = now().date()
     tipo = request.GET.get("total_tipo", "dia")
     valor = request.GET.get("total_valor", "")
     consulta_activa = bool(valor)
 
     if not consulta_activa:
-        total = _sumar_ventas(ventas.filter(fecha=hoy))
+        total = await _sumar_ventas(ventas.filter(fecha=hoy))
         return {
             "tipo": "dia",
             "valor": hoy.isoformat(),
@@ -247,7 +440,7 @@ def _consulta_total_ventas(request, ventas):
         if tipo == "mes":
             ano, mes = [int(parte) for parte in valor.split("-", 1)]
             inicio = date(ano, mes, 1)
-            total = _sumar_ventas(ventas.filter(fecha__year=ano, fecha__month=mes))
+            total = await _sumar_ventas(VentaAcumulada.objects.filter(tipo=VentaAcumulada.MES, inicio=inicio))
             return {
                 "tipo": "mes",
                 "valor": valor,
@@ -259,7 +452,7 @@ def _consulta_total_ventas(request, ventas):
         if tipo in ("año", "ano"):
             ano = int(valor)
             inicio = date(ano, 1, 1)
-            total = _sumar_ventas(ventas.filter(fecha__year=ano))
+            total = await _sumar_ventas(VentaAcumulada.objects.filter(tipo=VentaAcumulada.ANO, inicio=inicio))
             return {
                 "tipo": "año",
                 "valor": valor,
@@ -269,7 +462,7 @@ def _consulta_total_ventas(request, ventas):
             }
 
         dia = date.fromisoformat(valor)
-        total = _sumar_ventas(ventas.filter(fecha=dia))
+        total = await _sumar_ventas(ventas.filter(fecha=dia))
         return {
             "tipo": "dia",
             "valor": valor,
@@ -278,7 +471,7 @@ def _consulta_total_ventas(request, ventas):
             "datos": [{"periodo": dia, "total": total}],
         }
     except (TypeError, ValueError):
-        total = _sumar_ventas(ventas.filter(fecha=hoy))
+        total = await _sumar_ventas(ventas.filter(fecha=hoy))
         return {
             "tipo": "dia",
             "valor": hoy.isoformat(),
@@ -288,11 +481,16 @@ def _consulta_total_ventas(request, ventas):
         }
 
 
-def dashboard_ventas(request):
+async def dashboard_ventas(request):
+    contexto = await aobtener_dashboard(request.GET, lambda: _contexto_dashboard(request))
+    return render(request, "menu/dashboard.html", contexto)
+
+
+async def _contexto_dashboard(request):
     filtro = request.GET.get("filtro", "dia")
 
     ventas = VentaDiaria.objects.all().order_by("fecha")
-    consulta_total = _consulta_total_ventas(request, ventas)
+    consulta_total = await _consulta_total_ventas(request, ventas)
 
     if consulta_total["datos"] is not None:
         filtro = consulta_total["tipo"]
@@ -300,16 +498,17 @@ def dashboard_ventas(request):
     elif filtro == "dia":
         datos = ventas.annotate(periodo=TruncDay("fecha")).values("periodo").annotate(total=Sum("total")).order_by("periodo")
     elif filtro == "semana":
-        datos = _ventas_por_semana_desde_enero(ventas)
+        # Semana ISO 8601 (lunes a domingo), desde los acumulados
+        datos = VentaAcumulada.por_periodo(VentaAcumulada.SEMANA)
     elif filtro == "mes":
-        datos = ventas.annotate(periodo=TruncMonth("fecha")).values("periodo").annotate(total=Sum("total")).order_by("periodo")
+        datos = VentaAcumulada.por_periodo(VentaAcumulada.MES)
     elif filtro == "año":
-        datos = ventas.annotate(periodo=TruncYear("fecha")).values("periodo").annotate(total=Sum("total")).order_by("periodo")
+        datos = VentaAcumulada.por_periodo(VentaAcumulada.ANO)
     else:
         filtro = "dia"
         datos = ventas.annotate(periodo=TruncDay("fecha")).values("periodo").annotate(total=Sum("total")).order_by("periodo")
 
-    datos = list(datos)
+    datos = [dato async for dato in datos] if hasattr(datos, "__aiter__") else list(datos)
     for dato in datos:
         dato["periodo_label"] = _periodo_label(dato["periodo"], filtro)
 
@@ -319,7 +518,7 @@ def dashboard_ventas(request):
     paginator = Paginator(datos, 15)
     page_obj = paginator.get_page(request.GET.get("page"))
 
-    return render(request, "menu/dashboard.html", {
+    return {
         "filtro": filtro,
         "labels": json.dumps(labels),
         "valores": json.dumps(valores),
@@ -327,7 +526,7 @@ def dashboard_ventas(request):
         "consulta_total": consulta_total,
         "datos": page_obj,
         "page_obj": page_obj,
-    })
+    }
 
 
 # =====================
@@ -359,7 +558,7 @@ def crear_producto(request):
 
 @login_required
 def crear_menu(request):
-    categorias = Categoria.objects.all().prefetch_related("productos")
+    categorias = obtener_catalogo()
     return render(request, "menu/crear_menu.html", {"categorias": categorias})
 
 
@@ -419,7 +618,7 @@ def crear_mesa(request):
 
 
 def listar_mesas(request):
-    mesas = Mesa.objects.all()
+    mesas = tablero_mesas()
     return render(request, "menu/listar_mesas.html", {"mesas": mesas})
 
 
@@ -431,9 +630,34 @@ def borrar_mesa(request, mesa_id):
     return render(request, "menu/confirmar_borrar.html", {"mesa": mesa})
 
 
+# =====================
+# Rendimiento
+# =====================
+@staff_member_required
+def rendimiento(request):
+    # Solo las peticiones de este worker: cada proceso guarda las suyas
+    registros = peticiones_recientes()
+    return render(request, "menu/rendimiento.html", {
+        "peores": sorted(registros, key=lambda r: r["total_ms"], reverse=True)[:RENDIMIENTO_PEORES],
+        "vistas": resumen_por_vista(registros),
+        "total": len(registros),
+        "pid": os.getpid(),
+        "umbral_ms": settings.RENDIMIENTO_LENTO_MS,
+    })
+
+
+def metricas(request):
+    # Formato de texto de Prometheus; la cola de cocina se lee en cada scrape
+    if not puede_ver_metricas(request):
+        response = HttpResponse(status=401)
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+    return HttpResponse(exponer(ColaCocinaCollector()), content_type=CONTENT_TYPE_LATEST)
+
+
 
-def Menu_cliente(request):
-    categorias = Categoria.objects.prefetch_related("productos").all()
+async def Menu_cliente(request):
+    categorias = await aobtener_catalogo()
     return render(request, "menu/menu_cliente.html", {
         "categorias": categorias
     })
@@ -0,0 +1,68 @@
+"""Métricas en formato Prometheus para ``/metrics``.
+
+Con ``PROMETHEUS_MULTIPROC_DIR`` cada worker de gunicorn escribe sus
+contadores e histogramas en archivos de ese directorio y cualquier worker
+que atienda el scrape los suma; sin la variable (runserver, tests) todo vive
+en el proceso. El directorio se vacía al arrancar (entrypoint.sh).
+"""
+
+import hmac
+import os
+
+from django.conf import settings
+from django.db import transaction
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+
+
+REGISTRO = CollectorRegistry()
+
+LATENCIA = Histogram(
+    "restaurante_peticion_duracion_segundos",
+    "Tiempo de respuesta por nombre de URL.",
+    ["vista", "metodo"],
+    registry=REGISTRO,
+)
+PEDIDOS = Counter(
+    "restaurante_pedidos",
+    "Pedidos creados, confirmados y cerrados (ticket).",
+    ["evento"],
+    registry=REGISTRO,
+)
+EVENTOS_PEDIDO = ("creado", "confirmado", "cerrado")
+for _evento in EVENTOS_PEDIDO:
+    # En cero desde el arranque: rate() necesita la serie antes del primer pedido
+    PEDIDOS.labels(evento=_evento)
+
+# Rutas que no resuelven (estáticos, 404) comparten etiqueta: una por URL
+# dispararía la cardinalidad
+SIN_VISTA = "sin_vista"
+METODOS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+def observar_peticion(vista, metodo, segundos):
+    metodo = metodo if metodo in METODOS else "otro"
+    LATENCIA.labels(vista=vista or SIN_VISTA, metodo=metodo).observe(segundos)
+
+
+def contar_pedido(evento):
+    """Suma ``evento`` cuando la transacción actual se confirma."""
+    transaction.on_commit(lambda: PEDIDOS.labels(evento=evento).inc())
+
+
+def puede_ver_metricas(request):
+    """Prometheus con ``METRICAS_TOKEN`` como bearer token, o un usuario staff."""
+    esquema, _, token = request.headers.get("Authorization", "").partition(" ")
+    if settings.METRICAS_TOKEN and esquema.lower() == "bearer":
+        return hmac.compare_digest(token.encode(), settings.METRICAS_TOKEN.encode())
+    return request.user.is_active and request.user.is_staff
+
+
+def exponer(*colectores):
+    """Texto de exposición: métricas de todos los workers más ``colectores``."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registro = CollectorRegistry()
+        MultiProcessCollector(registro)
+    else:
+        registro = REGISTRO
+    return b"".join(generate_latest(colector) for colector in (registro, *colectores))
@@ -0,0 +1,175 @@
+"""Tiempos por petición: SQL, plantillas y total.
+
+Cada respuesta lleva un ``Server-Timing``; las peticiones que superan
+``RENDIMIENTO_LENTO_MS`` se escriben en el log ``restaurante.rendimiento`` y
+las últimas ``RENDIMIENTO_BUFFER`` quedan en memoria del worker para la vista
+de staff. Sin APM externo. El mismo total alimenta el histograma de
+``/metrics``.
+"""
+
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates, Template
+
+from .metricas import observar_peticion
+
+
+logger = logging.getLogger(__name__)
+
+_medicion = ContextVar("rendimiento_medicion", default=None)
+_recientes = deque(maxlen=int(os.environ.get("RENDIMIENTO_BUFFER", "500")))
+
+
+class Medicion:
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.db_ms = 0.0
+        self.plantillas_ms = 0.0
+
+
+def _medir_sql(execute, sql, params, many, context):
+    medicion = _medicion.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.consultas += 1
+        medicion.db_ms += (time.perf_counter() - inicio) * 1000
+
+
+def _instalar(connection, **kwargs):
+    if _medir_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_medir_sql)
+
+
+# Las vistas async consultan desde otros hilos, cada uno con su conexión
+connection_created.connect(_instalar)
+
+
+class TemplateMedido(Template):
+    def render(self, context=None, request=None):
+        medicion = _medicion.get()
+        if medicion is None:
+            return super().render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicion.plantillas_ms += (time.perf_counter() - inicio) * 1000
+
+
+class PlantillasMedidas(DjangoTemplates):
+    """Backend de Django que suma a la petición el tiempo de cada render."""
+
+    def from_string(self, template_code):
+        return TemplateMedido(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        plantilla = super().get_template(template_name)
+        return TemplateMedido(plantilla.template, self)
+
+
+def peticiones_recientes():
+    return list(_recientes)
+
+
+def percentil(valores, porcentaje):
+    if not valores:
+        return 0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * porcentaje / 100))]
+
+
+def resumen_por_vista(registros):
+    """Por vista: peticiones, p50/p95/máximo del total y promedio de consultas."""
+    por_vista = {}
+    for registro in registros:
+        por_vista.setdefault(registro["vista"] or registro["ruta"], []).append(registro)
+
+    filas = []
+    for vista, grupo in por_vista.items():
+        totales = sorted(registro["total_ms"] for registro in grupo)
+        filas.append({
+            "vista": vista,
+            "peticiones": len(grupo),
+            "p50_ms": percentil(totales, 50),
+            "p95_ms": percentil(totales, 95),
+            "max_ms": totales[-1],
+            "consultas": round(sum(registro["consultas"] for registro in grupo) / len(grupo), 1),
+            "db_ms": round(sum(registro["db_ms"] for registro in grupo) / len(grupo), 1),
+        })
+    return sorted(filas, key=lambda fila: fila["p95_ms"], reverse=True)
+
+
+class RendimientoMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion, token = self._iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self._terminar(request, response, medicion)
+
+    async def __acall__(self, request):
+        medicion, token = self._iniciar()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self._terminar(request, response, medicion)
+
+    def _iniciar(self):
+        for alias in connections:
+            _instalar(connections[alias])
+        medicion = Medicion()
+        return medicion, _medicion.set(medicion)
+
+    def _terminar(self, request, response, medicion):
+        total_ms = (time.perf_counter() - medicion.inicio) * 1000
+        response["Server-Timing"] = (
+            f'db;dur={medicion.db_ms:.1f};desc="SQL ({medicion.consultas})", '
+            f"tpl;dur={medicion.plantillas_ms:.1f}, "
+            f"total;dur={total_ms:.1f}"
+        )
+
+        match = request.resolver_match
+        registro = {
+            "metodo": request.method,
+            "ruta": request.path,
+            "vista": match.view_name if match else "",
+            "estado": response.status_code,
+            "total_ms": round(total_ms, 1),
+            "db_ms": round(medicion.db_ms, 1),
+            "consultas": medicion.consultas,
+            "plantillas_ms": round(medicion.plantillas_ms, 1),
+            "pid": os.getpid(),
+            "fecha": time.time(),
+        }
+        _recientes.append(registro)
+        observar_peticion(registro["vista"], request.method, total_ms / 1000)
+
+        if total_ms >= settings.RENDIMIENTO_LENTO_MS:
+            logger.warning("peticion_lenta %s", json.dumps(registro))
+        return response
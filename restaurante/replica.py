@@ -0,0 +1,127 @@
+"""Lecturas de reportes y catálogo en la réplica (``DATABASE_REPLICA``).
+
+Solo se usa la réplica dentro de una petición GET/HEAD de un cliente que no
+escribió en los últimos ``REPLICA_PIN_SEGUNDOS``: quien acaba de guardar algo
+lo ve aunque la réplica vaya atrasada. Comandos, workers y señales fuera de
+una petición siempre leen de la primaria.
+"""
+
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+PRIMARIA = "default"
+COOKIE_PRIMARIA = "leer_primaria"
+
+# Modelos que solo se leen para mostrar: los pedidos y mesas nunca salen de
+# la primaria porque se bloquean y modifican en la misma petición.
+MODELOS_REPLICA = {
+    "menu.categoria",
+    "menu.producto",
+    "menu.ventadiaria",
+    "menu.ventaacumulada",
+    "menu.pedidohistorico",
+    "menu.pedidoitemhistorico",
+}
+
+
+class _Estado:
+    def __init__(self, replica):
+        self.replica = replica
+        self.escribio = False
+
+
+_estado = ContextVar("replica_estado", default=None)
+
+
+def alias_replica():
+    return getattr(settings, "DATABASE_REPLICA", None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = alias_replica()
+        estado = _estado.get()
+        if (
+            replica is None
+            or estado is None
+            or not estado.replica
+            or estado.escribio
+            or model._meta.label_lower not in MODELOS_REPLICA
+        ):
+            return None
+        # Relaciones de un objeto ya cargado: misma base que el objeto
+        if "instance" in hints:
+            return None
+        return replica
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            estado.escribio = True
+        return PRIMARIA
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {PRIMARIA, alias_replica()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == alias_replica():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Decide por petición si las lecturas pueden ir a la réplica."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        estado, token = self._iniciar(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self._terminar(estado, response)
+
+    async def __acall__(self, request):
+        estado, token = self._iniciar(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self._terminar(estado, response)
+
+    def _iniciar(self, request):
+        replica = (
+            alias_replica() is not None
+            and request.method in ("GET", "HEAD")
+            and COOKIE_PRIMARIA not in request.COOKIES
+        )
+        estado = _Estado(replica)
+        return estado, _estado.set(estado)
+
+    def _terminar(self, estado, response):
+        if estado.escribio and alias_replica() is not None:
+            # Las lecturas siguientes de este cliente van a la primaria hasta
+            # que la réplica haya alcanzado la escritura
+            response.set_cookie(
+                COOKIE_PRIMARIA,
+                "1",
+                max_age=settings.REPLICA_PIN_SEGUNDOS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -22,7 +22,7 @@ import os
 SECRET_KEY = 'django-insecure-g4_@%m_65uy=flaq9m$apz2%ff_d(4b!)0t*(d$dcrylptwdw5'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get("DJANGO_DEBUG", "1") == "1"
 
 ALLOWED_HOSTS = ALLOWED_HOSTS = ["localhost", "127.0.0.1", "213.199.58.201"]
 
@@ -39,18 +39,32 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # El primero: su tiempo total incluye el resto de los middleware
+    'restaurante.rendimiento.RendimientoMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Antes que cualquier middleware que lea de la base (sesión, usuario)
+    'restaurante.replica.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    
-    
-    'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
+# Servidor con el que corre gunicorn (entrypoint.sh); ASGI si no se indica
+SERVIDOR = os.environ.get("DJANGO_SERVIDOR", "asgi")
+
+if SERVIDOR == "wsgi":
+    # Justo después de SecurityMiddleware: los estáticos no pasan por sesión,
+    # CSRF ni autenticación. Con ASGI no se usa: WhiteNoise es solo síncrono
+    # y obligaría a adaptar cada petición (vistas async y streams de cocina)
+    # a un hilo; los estáticos los sirve nginx.
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+        'whitenoise.middleware.WhiteNoiseMiddleware',
+    )
+
 
 
 
@@ -89,7 +103,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que mide el tiempo de render (Server-Timing)
+        'BACKEND': 'restaurante.rendimiento.PlantillasMedidas',
         "DIRS": [BASE_DIR / "templates"],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -133,6 +148,92 @@ DATABASES = {
 #     }
 # }
 
+if os.environ.get("DATABASE_URL"):
+    DATABASES["default"] = dj_database_url.parse(os.environ["DATABASE_URL"])
+
+# Réplica de solo lectura (opcional) para reportes y catálogo; ver
+# restaurante/replica.py. En los tests apunta a la misma base que default.
+DATABASE_REPLICA = None
+if os.environ.get("DATABASE_REPLICA_URL"):
+    DATABASES["replica"] = dj_database_url.parse(os.environ["DATABASE_REPLICA_URL"])
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+    DATABASE_REPLICA = "replica"
+
+DATABASE_ROUTERS = ["restaurante.replica.ReplicaRouter"]
+
+# Segundos que un cliente lee de la primaria después de escribir; debe
+# superar el retraso normal de la réplica.
+REPLICA_PIN_SEGUNDOS = int(os.environ.get("REPLICA_PIN_SEGUNDOS", "10"))
+
+# Conexiones a PostgreSQL, por worker de gunicorn:
+#   persistentes  una conexión por worker que se reutiliza entre peticiones y
+#                 se verifica antes de usarla (workers WSGI síncronos)
+#   pool          pool de psycopg 3 (ASGI: cada petición corre en su propio
+#                 hilo y las conexiones persistentes se acumularían)
+#   sin           una conexión nueva por petición
+# Por defecto según SERVIDOR.
+# Solo se aplica a PostgreSQL: otros motores (SQLite en desarrollo) no
+# aceptan la opción pool.
+DB_CONEXIONES = os.environ.get(
+    "DB_CONEXIONES",
+    "persistentes" if SERVIDOR == "wsgi" else "pool",
+)
+
+for base in DATABASES.values():
+    if base.get("ENGINE") != "django.db.backends.postgresql":
+        continue
+    if DB_CONEXIONES == "persistentes":
+        base["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", "300"))
+        base["CONN_HEALTH_CHECKS"] = True
+    elif DB_CONEXIONES == "pool":
+        base["CONN_MAX_AGE"] = 0
+        # Con pool, Django verifica cada conexión antes de entregarla
+        base["CONN_HEALTH_CHECKS"] = True
+        base.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN", "2")),
+            "max_size": int(os.environ.get("DB_POOL_MAX", "8")),
+            "timeout": int(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        }
+
+
+# Cache
+# Compartida por todos los workers de gunicorn: el catálogo y sus versiones
+# deben verse igual desde cualquier proceso.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("DJANGO_CACHE_DIR", "/tmp/restaurante_cache"),
+        "OPTIONS": {
+            # Con el máximo por defecto (300) el catálogo y las variantes del
+            # dashboard se descartaban al azar
+            "MAX_ENTRIES": int(os.environ.get("DJANGO_CACHE_MAX_ENTRIES", "5000")),
+        },
+    }
+}
+
+
+# Ventas
+# Número de filas por día en VentaDiaria. Con más de una, cada worker suma en
+# la suya y el cierre de caja no compite por una sola fila.
+
+VENTAS_CAJAS = int(os.environ.get("VENTAS_CAJAS", "1"))
+
+# Días que un pedido entregado permanece en las tablas de servicio antes de
+# que archivar_pedidos lo mueva al historial.
+
+PEDIDOS_ARCHIVO_DIAS = int(os.environ.get("PEDIDOS_ARCHIVO_DIAS", "30"))
+
+
+# Rendimiento
+# Peticiones más lentas que esto (ms) se escriben en el log
+# restaurante.rendimiento; ver /rendimiento/ para las peores recientes.
+
+RENDIMIENTO_LENTO_MS = int(os.environ.get("RENDIMIENTO_LENTO_MS", "500"))
+
+# /metrics: Prometheus manda "Authorization: Bearer <METRICAS_TOKEN>"
+# (bearer_token en su scrape_config). Sin token solo lo ven usuarios staff.
+METRICAS_TOKEN = os.environ.get("METRICAS_TOKEN", "")
 
 
 # Password validation
@@ -172,14 +273,17 @@ LOGIN_REDIRECT_URL = "/"   # dónde irá después de loguearse
 LOGOUT_REDIRECT_URL = "/"  # dónde irá después de salir
 
 
-STATIC_ROOT = '/static/'
+STATIC_ROOT = os.environ.get("STATIC_ROOT", '/static/')
 STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join( 'static'))
 
 
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", os.path.join(BASE_DIR, 'media'))
+
+# Subidas recibidas y aún no enviadas al storage (ver subir_imagenes_pendientes)
+MEDIA_STAGING_ROOT = os.environ.get("MEDIA_STAGING_ROOT", os.path.join(BASE_DIR, 'media_pendiente'))
 
 
 
@@ -195,12 +299,17 @@ AWS_STORAGE_BUCKET_NAME = 'restauranteapp'
 AWS_S3_CUSTOM_DOMAIN = f"{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com"
 
 STORAGES = {
+    # Archivos nombrados por el hash de su contenido, con caché inmutable
     "default": {
-        "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
-        "OPTIONS": {"bucket_name": AWS_STORAGE_BUCKET_NAME},
+        "BACKEND": "restaurante.storage.MediaStore",
+        "OPTIONS": {
+            "bucket_name": AWS_STORAGE_BUCKET_NAME,
+            "custom_domain": AWS_S3_CUSTOM_DOMAIN,
+        },
     },
+    # Nombres con hash de contenido (ver collectstatic), caché inmutable
     "staticfiles": {
-        "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+        "BACKEND": "restaurante.storage.StaticStore",
         "OPTIONS": {
             "bucket_name": AWS_STORAGE_BUCKET_NAME,
             "custom_domain": AWS_S3_CUSTOM_DOMAIN,
@@ -222,7 +331,22 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
-if DEBUG:
+# MEDIA_BACKEND=local guarda la media en MEDIA_ROOT (servida por nginx)
+if os.environ.get("MEDIA_BACKEND") == "local":
+    MEDIA_URL = '/media/'
+    STORAGES["default"] = {
+        "BACKEND": "restaurante.storage.HashedMediaStorage",
+    }
+
+# STATIC_BACKEND=local: collectstatic deja en STATIC_ROOT cada archivo con
+# hash en el nombre más sus versiones .gz y .br; nginx (o WhiteNoise con
+# DJANGO_SERVIDOR=wsgi) los sirve con caché inmutable
+if os.environ.get("STATIC_BACKEND") == "local":
+    STATIC_URL = '/static/'
+    STORAGES["staticfiles"] = {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    }
+elif DEBUG:
     STATIC_URL = '/static/'
     STORAGES["staticfiles"] = {
         "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
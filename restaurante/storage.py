@@ -1,5 +1,87 @@
+import hashlib
+import os
+import re
+
+from django.contrib.staticfiles.storage import ManifestFilesMixin
+from django.core.files.storage import FileSystemStorage
 from storages.backends.s3boto3 import S3Boto3Storage
 
-class MediaStore(S3Boto3Storage):
-    location = 'media'
-    file_overwrite = False
\ No newline at end of file
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+SHORT_CACHE_CONTROL = "public, max-age=300"
+
+# Nombres que genera ManifestFilesMixin: ui.1a2b3c4d5e6f.css
+FINGERPRINTED_NAME = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+
+
+class ContentAddressedMixin:
+    """Nombra cada archivo subido con el SHA-256 de su contenido.
+
+    La misma foto subida dos veces queda con el mismo nombre y se guarda una
+    sola vez; como un nombre nunca apunta a otros bytes, se puede cachear
+    para siempre.
+    """
+
+    hash_chunk_size = 64 * 1024
+
+    def content_hash(self, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in iter(lambda: content.read(self.hash_chunk_size), b""):
+            digest.update(chunk)
+        content.seek(0)
+        return digest.hexdigest()
+
+    def save(self, name, content, max_length=None):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        hashed_name = os.path.join(directory, f"{self.content_hash(content)}{extension}")
+
+        # Con file_overwrite (S3) volver a subir el mismo contenido no cambia
+        # nada y se ahorra el HEAD de exists()
+        if not getattr(self, "file_overwrite", False) and self.exists(hashed_name):
+            return hashed_name
+        return super().save(hashed_name, content, max_length=max_length)
+
+    def save_as(self, name, content, max_length=None):
+        """Guarda con ``name`` tal cual (archivos derivados de uno con hash)."""
+        return super().save(name, content, max_length=max_length)
+
+
+class HashedMediaStorage(ContentAddressedMixin, FileSystemStorage):
+    pass
+
+
+class MediaStore(ContentAddressedMixin, S3Boto3Storage):
+    # Las imágenes de productos siempre han vivido bajo el prefijo de
+    # AWS_LOCATION ("static/productos/..."); los nombres existentes deben
+    # seguir resolviendo.
+    location = 'static'
+    # Mismo nombre, mismo contenido: sobrescribir es inofensivo y save() no
+    # consulta exists() antes de subir
+    file_overwrite = True
+    # URLs estables y sin firma para que navegadores y CDN las guarden. Pide
+    # lectura pública en el prefijo "static/", de la que ya dependen los
+    # estáticos (se sirven sin firma desde el mismo bucket).
+    querystring_auth = False
+    object_parameters = {"CacheControl": IMMUTABLE_CACHE_CONTROL}
+
+
+class StaticStore(ManifestFilesMixin, S3Boto3Storage):
+    """Estáticos con hash en S3.
+
+    Solo las copias con hash se cachean para siempre; los originales sin
+    hash y el manifiesto llevan un max-age corto porque sus nombres se
+    reutilizan en cada despliegue.
+    """
+
+    location = 'static'
+    querystring_auth = False
+
+    def get_object_parameters(self, name):
+        params = super().get_object_parameters(name)
+        if FINGERPRINTED_NAME.search(name):
+            params["CacheControl"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            params["CacheControl"] = SHORT_CACHE_CONTROL
+        return params